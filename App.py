@@ -2,26 +2,28 @@ import discord
 import os
 from SBAuctions import SBAuctions
 
-TOKEN = os.environ["TOKEN"]
 
-bot: discord.Bot = discord.Bot(intents=discord.Intents.all())
-auctions = SBAuctions()
+# everything is built under main, decode workers are spawned and re-import this module
+def main():
+    bot: discord.Bot = discord.Bot(intents=discord.Intents.all())
+    auctions = SBAuctions()
 
+    @bot.event
+    async def on_ready():
+        print(f"We have logged in as {bot.user}")
 
-@bot.event
-async def on_ready():
-    print(f"We have logged in as {bot.user}")
+    @bot.slash_command()
+    async def reload(ctx: discord.ApplicationContext):
+        bot.reload_extension("cogs.auctions")
+        await ctx.respond("Done")
 
-
-@bot.slash_command()
-async def reload(ctx: discord.ApplicationContext):
-    bot.reload_extension("cogs.auctions")
-    await ctx.respond("Done")
-
-if __name__ == "__main__":
     auctions.start()
 
     bot.scrapper = auctions
     bot.load_extension("cogs.auctions")
 
-    bot.run(TOKEN)
+    bot.run(os.environ["TOKEN"])
+
+
+if __name__ == "__main__":
+    main()
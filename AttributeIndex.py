@@ -0,0 +1,108 @@
+import bisect
+from Catalog import Catalog
+
+
+class AttributeIndex:
+    # Inverted index of extras per item: {item_id: {path: {value: {uuid}}}}.
+    # Integer values also keep a sorted list of distinct values per path for range lookups.
+    # Reads from other threads only use single C level operations (dict.get, set copies, bisect)
+    # and callers filter results against a Snapshot, see SBAuctions.find_auctions.
+    def __init__(self):
+        self.__postings = {}
+        self.__numbers = {}  # {item_id: {path: [sorted distinct int values]}}
+
+    @staticmethod
+    def path(attribute) -> tuple:
+        # "enchantments.sharpness" or ("enchantments", "sharpness")
+        return tuple(attribute.split(".")) if isinstance(attribute, str) else tuple(attribute)
+
+    @staticmethod
+    def __is_number(value) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def add(self, item_id: str, uuid: str, extras: dict):
+        paths = self.__postings.setdefault(item_id, {})
+        for path, value in Catalog.walk(extras):
+            values = paths.setdefault(path, {})
+            uuids = values.get(value)
+            if uuids is None:
+                uuids = values[value] = set()
+                if self.__is_number(value):
+                    bisect.insort(self.__numbers.setdefault(item_id, {}).setdefault(path, []), value)
+            uuids.add(uuid)
+
+    def remove(self, item_id: str, uuid: str, extras: dict):
+        paths = self.__postings.get(item_id)
+        if paths is None:
+            return
+
+        for path, value in Catalog.walk(extras):
+            values = paths.get(path)
+            uuids = values.get(value) if values else None
+            if uuids is None:
+                continue
+
+            uuids.discard(uuid)
+            if uuids:
+                continue
+
+            del values[value]
+            if self.__is_number(value):
+                numbers = self.__numbers[item_id][path]
+                del numbers[bisect.bisect_left(numbers, value)]
+                if not numbers:
+                    del self.__numbers[item_id][path]
+            if not values:
+                del paths[path]
+
+        if not paths:
+            del self.__postings[item_id]
+            self.__numbers.pop(item_id, None)
+
+    def __postings_for(self, item_id: str, attribute, value):
+        # live set, never handed out
+        values = self.__postings.get(item_id, {}).get(self.path(attribute), {})
+        return values.get(Catalog.canonical(value), frozenset())
+
+    def lookup(self, item_id: str, attribute, value) -> set[str]:
+        return set(self.__postings_for(item_id, attribute, value))
+
+    def counts(self, item_id: str) -> dict:
+        # {(path, value): live auctions}
+        return {
+            (path, value): len(uuids)
+            for path, values in self.__postings.get(item_id, {}).items() for value, uuids in values.items()
+        }
+
+    def range(self, item_id: str, attribute, low: int = None, high: int = None) -> set[str]:
+        # bounds are inclusive, None leaves that side open
+        path = self.path(attribute)
+        numbers = self.__numbers.get(item_id, {}).get(path, [])
+        start = 0 if low is None else bisect.bisect_left(numbers, low)
+        stop = len(numbers) if high is None else bisect.bisect_right(numbers, high)
+
+        values = self.__postings.get(item_id, {}).get(path, {})
+        result = set()
+        for value in numbers[start:stop]:
+            result.update(values.get(value, ()))
+        return result
+
+    def __match(self, item_id: str, condition) -> set[str]:
+        attribute, value = condition
+        if isinstance(value, slice):
+            return self.range(item_id, attribute, value.start, value.stop)
+        return self.__postings_for(item_id, attribute, value)
+
+    def query(self, item_id: str, all_of=(), any_of=()) -> set[str] | None:
+        # conditions are (attribute, value) or (attribute, slice(low, high)) for inclusive int ranges
+        # None when there are no conditions at all, i.e. every auction matches
+        result = None
+        if all_of:
+            matches = sorted((self.__match(item_id, condition) for condition in all_of), key=len)
+            result = set(matches[0].intersection(*matches[1:]))  # smallest first, always a new set
+
+        if any_of:
+            either = set().union(*(self.__match(item_id, condition) for condition in any_of))
+            result = either if result is None else result & either
+
+        return result
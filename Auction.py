@@ -0,0 +1,94 @@
+import sys
+import zlib
+from collections.abc import Mapping
+
+
+class Auction(Mapping):
+    # Compact record for a live auction.
+    # Reads like the api dict (auction["price"], auction["bin"]) but only keeps what we use.
+    __slots__ = (
+        "uuid", "item_id", "item_name", "tier", "start", "end",
+        "starting_bid", "highest_bid_amount", "bin", "count", "extras", "_lore"
+    )
+    KEYS = (
+        "uuid", "item_id", "item_name", "tier", "start", "end",
+        "starting_bid", "highest_bid_amount", "bin", "count", "extras", "price"
+    )
+    __KEY_SET = frozenset(KEYS)
+
+    def __init__(
+            self, uuid: str, item_id: str, item_name: str, tier: str, start: int, end: int,
+            starting_bid: int, highest_bid_amount: int, bin: bool, count: int, extras: dict, lore: bytes = None
+    ):
+        self.uuid = uuid
+        self.item_id = sys.intern(item_id)
+        self.item_name = sys.intern(item_name)
+        self.tier = sys.intern(tier)
+        self.start = int(start)
+        self.end = int(end)
+        self.starting_bid = int(starting_bid)
+        self.highest_bid_amount = int(highest_bid_amount)
+        self.bin = bool(bin)
+        self.count = count
+        self.extras = extras  # shared with the decode cache, read-only
+        self._lore = lore  # zlib compressed
+
+    @classmethod
+    def from_api(cls, auction: dict, item_id: str, count: int, extras: dict, keep_lore: bool = False):
+        lore = auction.get("item_lore") if keep_lore else None
+
+        return cls(
+            auction["uuid"],
+            item_id,
+            auction.get("item_name", ""),
+            auction.get("tier", ""),
+            auction["start"],
+            auction["end"],
+            auction["starting_bid"],
+            auction.get("highest_bid_amount", 0),
+            auction["bin"],
+            count,
+            extras,
+            zlib.compress(lore.encode()) if lore else None
+        )
+
+    @property
+    def price(self) -> int:
+        if self.bin or self.highest_bid_amount == 0:
+            return self.starting_bid
+        return self.highest_bid_amount
+
+    @property
+    def lore(self) -> str | None:
+        if self._lore is None:
+            return None
+        return zlib.decompress(self._lore).decode()
+
+    def with_bid(self, highest_bid_amount: int) -> "Auction":
+        # copy with a new highest bid, published snapshots keep holding the old record
+        return Auction(
+            uuid=self.uuid, item_id=self.item_id, item_name=self.item_name, tier=self.tier,
+            start=self.start, end=self.end, starting_bid=self.starting_bid, highest_bid_amount=highest_bid_amount,
+            bin=self.bin, count=self.count, extras=self.extras, lore=self._lore
+        )
+
+    def __reduce__(self):
+        # positional args only, far smaller than the default slot state when pickling the index
+        return Auction, (
+            self.uuid, self.item_id, self.item_name, self.tier, self.start, self.end,
+            self.starting_bid, self.highest_bid_amount, self.bin, self.count, self.extras, self._lore
+        )
+
+    def __getitem__(self, key: str):
+        if key not in self.__KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"Auction({self.uuid}, {self.item_id}, price={self.price}, bin={self.bin})"
@@ -0,0 +1,96 @@
+from collections import Counter
+
+
+class Catalog:
+    # Reference counted attribute values per category.
+    # {category: {path: Counter(value)}} where path is the key chain into extras, e.g. ("enchantments", "sharpness").
+    # Inserting an auction's extras increments, removing it decrements, so only live values are kept.
+    def __init__(self):
+        self.__counts = {}
+
+    @classmethod
+    def canonical(cls, value):
+        # hashable, order independent form of nested extras values
+        match value:
+            case dict():
+                return frozenset((k, cls.canonical(v)) for k, v in value.items())
+            case list():
+                return tuple(cls.canonical(v) for v in value)
+        return value
+
+    @classmethod
+    def thaw(cls, value):
+        match value:
+            case frozenset():
+                return {k: cls.thaw(v) for k, v in value}
+            case tuple():
+                return [cls.thaw(v) for v in value]
+        return value
+
+    @classmethod
+    def walk(cls, extras: dict, path: tuple = ()):
+        # (path, value) pairs, lists are split into their elements like update_attributes used to
+        for k, v in extras.items():
+            match v:
+                case dict():
+                    yield from cls.walk(v, path + (k,))
+                case list():
+                    for item in v:
+                        yield path + (k,), cls.canonical(item)
+                case _:
+                    yield path + (k,), v
+
+    def add(self, category: str, extras: dict):
+        paths = self.__counts.setdefault(category, {})
+        for path, value in self.walk(extras):
+            counts = paths.get(path)
+            if counts is None:
+                counts = paths[path] = Counter()
+            counts[value] += 1
+
+    def remove(self, category: str, extras: dict):
+        paths = self.__counts.get(category)
+        if paths is None:
+            return
+
+        for path, value in self.walk(extras):
+            counts = paths.get(path)
+            if counts is None or value not in counts:  # category changed since it was added
+                continue
+
+            counts[value] -= 1
+            if counts[value] <= 0:
+                del counts[value]
+                if not counts:
+                    del paths[path]
+
+        if not paths:
+            del self.__counts[category]
+
+    def __contains__(self, category: str) -> bool:
+        return category in self.__counts
+
+    def __iter__(self):
+        return iter(self.__counts)
+
+    def export(self, category: str) -> dict:
+        # same layout the attribute sets had: {attribute: values} or {attribute: {sub attribute: values}}
+        result = {}
+        for path, counts in sorted(self.__counts.get(category, {}).items(), key=lambda item: len(item[0])):
+            node = result
+            for key in path[:-1]:
+                if not isinstance(node.get(key), dict):
+                    node[key] = {}
+                node = node[key]
+
+            if isinstance(node.get(path[-1]), dict):  # nested attributes win over plain values
+                continue
+            if any(isinstance(value, frozenset) for value in counts):
+                node[path[-1]] = tuple(self.thaw(value) for value in counts)
+            else:
+                node[path[-1]] = frozenset(counts)
+        return result
+
+    def frequencies(self, category: str) -> dict:
+        # {path: {value: live auctions}}
+        return {path: dict(counts) for path, counts in self.__counts.get(category, {}).items()}
@@ -0,0 +1,94 @@
+import bisect
+
+
+class CategoryTable:
+    # item_id -> category and category -> item_ids from the items resource, plus live aggregates per category.
+    # Items without a category are their own category, like Processor.get_category always did.
+    QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+    def __init__(self, items: dict = None):
+        self.__categories = {}  # {item_id: category}
+        self.__members = {}  # {category: {item_id}}
+        self.__live = {}  # {category: [auction count, sorted [(bin price, uuid)]]}
+        if items:
+            self.update(items, items)
+
+    def update(self, items: dict, changed) -> dict:
+        # re-maps only the changed item_ids, returns {item_id: old category} for those that moved
+        moved = {}
+        for item_id in changed:
+            category = items[item_id].get("category", item_id) if item_id in items else item_id
+            old = self.category(item_id)
+            if category == old:
+                continue
+
+            moved[item_id] = old
+            self.__discard_member(item_id, old)
+            if category == item_id:
+                del self.__categories[item_id]
+            else:
+                self.__categories[item_id] = category
+                self.__members.setdefault(category, set()).add(item_id)
+        return moved
+
+    def __discard_member(self, item_id: str, category: str):
+        members = self.__members.get(category)
+        if members is not None:
+            members.discard(item_id)
+            if not members:
+                del self.__members[category]
+
+    def category(self, item_id: str) -> str:
+        return self.__categories.get(item_id, item_id)
+
+    def items(self, category: str) -> frozenset:
+        # an item without a category is the only member of its own
+        return frozenset(self.__members.get(category, (category,)))
+
+    def __iter__(self):
+        return iter(self.__members)
+
+    def add(self, auction, category: str = None):
+        category = category or self.category(auction.item_id)
+        live = self.__live.get(category)
+        if live is None:
+            live = self.__live[category] = [0, []]
+
+        live[0] += 1
+        if auction.bin:
+            bisect.insort(live[1], (auction.price, auction.uuid))
+
+    def remove(self, auction, category: str = None):
+        # category defaults to the current one, pass the old one when the item moved since add
+        category = category or self.category(auction.item_id)
+        live = self.__live.get(category)
+        if live is None:
+            return
+
+        live[0] -= 1
+        if auction.bin:
+            bins = live[1]
+            row = (auction.price, auction.uuid)
+            i = bisect.bisect_left(bins, row)
+            if i < len(bins) and bins[i] == row:
+                del bins[i]
+        if live[0] <= 0:
+            del self.__live[category]
+
+    def cheapest(self, category: str, limit: int = 10) -> list[str]:
+        # uuids of the lowest bins in the category
+        live = self.__live.get(category)
+        return [uuid for _, uuid in live[1][:limit]] if live else []
+
+    def summary(self, category: str) -> dict | None:
+        live = self.__live.get(category)
+        if live is None:
+            return None
+
+        count, bins = live
+        return {
+            "count": count,
+            "bins": len(bins),
+            "lowest_bin": bins[0][0] if bins else None,
+            "quantiles": {q: bins[min(len(bins) - 1, int(q * len(bins)))][0] for q in self.QUANTILES} if bins else {}
+        }
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from Processor import Processor
+
+
+class DecodeCache:
+    # LRU of decoded (item_id, count, extras) keyed by a digest of the raw base64 string.
+    # Decoded tuples are shared between auctions, extras must be treated as read-only.
+    def __init__(self, max_size: int = 50_000):
+        self.max_size = max_size
+        self.__entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(raw_bytes: str) -> bytes:
+        return hashlib.blake2b(raw_bytes.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> tuple[str, int, dict] | None:
+        decoded = self.__entries.get(key)
+        if decoded is None:
+            self.misses += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return decoded
+
+    def put(self, key: bytes, decoded: tuple[str, int, dict]):
+        self.__entries[key] = decoded
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.__entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class Decoder:
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, mode: str = "inline", workers: int = None, chunk_size: int = 250, cache_size: int = 50_000):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown decode mode: {mode}. Expected one of {self.MODES}")
+
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.cache = DecodeCache(cache_size) if cache_size else None
+
+        self.__executor: Executor | None = None
+
+    def __get_executor(self) -> Executor:
+        if self.__executor is None:
+            match self.mode:
+                case "thread":
+                    self.__executor = ThreadPoolExecutor(max_workers=self.workers)
+                case "process":
+                    # spawn, forking the bot's threads can deadlock the children
+                    # workers re-import __main__, App.py builds everything under its main guard
+                    self.__executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self.__executor
+
+    async def decode(self, raw_items: list[str]) -> list[tuple[str, int, dict]]:
+        if self.cache is None:
+            return await self.__decode(raw_items)
+
+        keys = [DecodeCache.key(raw_bytes) for raw_bytes in raw_items]
+        found = {}
+        pending = {}  # {key: raw_bytes} decoded once even if repeated within the batch
+        for key, raw_bytes in zip(keys, raw_items):
+            if key in found or key in pending:
+                self.cache.hits += 1
+                continue
+
+            decoded = self.cache.get(key)
+            if decoded is None:
+                pending[key] = raw_bytes
+            else:
+                found[key] = decoded
+
+        decoded_items = await self.__decode(list(pending.values()))
+        for key, decoded in zip(pending, decoded_items):
+            found[key] = decoded
+            self.cache.put(key, decoded)
+
+        return [found[key] for key in keys]
+
+    async def __decode(self, raw_items: list[str]) -> list[tuple[str, int, dict]]:
+        # small batches (most delta updates) aren't worth shipping to workers
+        if self.mode == "inline" or len(raw_items) <= self.chunk_size:
+            return Processor.decode_many(raw_items)
+
+        executor = self.__get_executor()
+        loop = asyncio.get_running_loop()
+
+        tasks = [
+            loop.run_in_executor(executor, Processor.decode_many, raw_items[i:i + self.chunk_size])
+            for i in range(0, len(raw_items), self.chunk_size)
+        ]
+        chunks = await asyncio.gather(*tasks)
+
+        return [decoded for chunk in chunks for decoded in chunk]
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
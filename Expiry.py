@@ -0,0 +1,36 @@
+import heapq
+
+
+class Expiry:
+    # Min-heap of (end, uuid) so auctions past their end time can be evicted in O(log n) each.
+    # Entries for auctions removed another way are left in place and skipped when popped,
+    # the heap is rebuilt from the live ones once stale entries outnumber them.
+    def __init__(self):
+        self.__heap = []
+        self.__ends = {}  # {uuid: end} of live auctions
+
+    def add(self, end: int, uuid: str):
+        self.__ends[uuid] = end
+        heapq.heappush(self.__heap, (end, uuid))
+
+    def discard(self, uuid: str):
+        if self.__ends.pop(uuid, None) is not None and len(self.__heap) > 2 * len(self.__ends) + 64:
+            self.__heap = [(end, uuid) for uuid, end in self.__ends.items()]
+            heapq.heapify(self.__heap)
+
+    def pop_expired(self, now: int) -> list[str]:
+        expired = []
+        while self.__heap and self.__heap[0][0] <= now:
+            end, uuid = heapq.heappop(self.__heap)
+            if self.__ends.get(uuid) == end:
+                del self.__ends[uuid]
+                expired.append(uuid)
+        return expired
+
+    def next_end(self) -> int | None:
+        while self.__heap and self.__ends.get(self.__heap[0][1]) != self.__heap[0][0]:
+            heapq.heappop(self.__heap)
+        return self.__heap[0][0] if self.__heap else None
+
+    def __len__(self) -> int:
+        return len(self.__ends)
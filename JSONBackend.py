@@ -0,0 +1,133 @@
+import json
+from typing import TypedDict
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class AuctionRecord(TypedDict):
+    # fields of an active auction that are actually used, everything else is dropped while parsing
+    uuid: str
+    item_name: str
+    tier: str
+    start: int
+    end: int
+    starting_bid: int
+    highest_bid_amount: int
+    bin: bool
+    item_bytes: str
+
+
+class AuctionsPage(TypedDict):
+    page: int
+    totalPages: int
+    lastUpdated: int
+    auctions: list[AuctionRecord]
+
+
+class JSONBackend:
+    NAMES = ("orjson", "msgspec", "json")  # preference order
+
+    def __init__(self, name: str = None, typed: bool = False):
+        available = self.available()
+        if name is None:
+            name = available[0]
+        elif name not in available:
+            raise ValueError(f"JSON backend {name} is not available. Installed: {available}")
+
+        if typed and name != "msgspec":
+            raise ValueError("Typed auction decoding requires the msgspec backend")
+
+        self.name = name
+        self.typed = typed
+
+        match name:
+            case "msgspec":
+                self.loads = msgspec.json.Decoder().decode
+                self.__page_loads = msgspec.json.Decoder(AuctionsPage).decode if typed else self.loads
+            case "orjson":
+                self.loads = orjson.loads
+                self.__page_loads = self.loads
+            case _:
+                self.loads = json.loads
+                self.__page_loads = self.loads
+
+    @classmethod
+    def available(cls) -> list[str]:
+        installed = {"msgspec": msgspec is not None, "orjson": orjson is not None, "json": True}
+        return [name for name in cls.NAMES if installed[name]]
+
+    def loads_page(self, data: bytes) -> dict:
+        # auction pages, trimmed to AuctionRecord fields when typed
+        return self.__page_loads(data)
+
+
+if __name__ == "__main__":
+    # benchmark parse time and retained memory per auctions page
+    # usage: python JSONBackend.py [page.json] [repeat]
+    # without a saved page a synthetic one is built from nutballs.json
+    import random
+    import sys
+    import timeit
+    import tracemalloc
+
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            data = f.read()
+    else:
+        with open("nutballs.json") as f:
+            sold = json.load(f)
+
+        auctions = []
+        for i in range(1000):
+            record = random.choice(sold)
+            auctions.append({
+                "uuid": f"{i:032x}",
+                "auctioneer": record["seller"],
+                "profile_id": record["seller_profile"],
+                "coop": [record["seller"]],
+                "start": record["timestamp"],
+                "end": record["timestamp"] + 86_400_000,
+                "item_name": "Item",
+                "item_lore": "§7Lore line\n" * 12,
+                "extra": "Item Lore line " * 12,
+                "category": "misc",
+                "tier": "RARE",
+                "starting_bid": record["price"],
+                "item_bytes": record["item_bytes"],
+                "claimed": False,
+                "claimed_bidders": [],
+                "highest_bid_amount": 0,
+                "last_updated": record["timestamp"],
+                "bin": record["bin"],
+                "bids": []
+            })
+        data = json.dumps({
+            "success": True, "page": 0, "totalPages": 1, "totalAuctions": len(auctions),
+            "lastUpdated": 0, "auctions": auctions
+        }).encode()
+
+    backends = [JSONBackend(name) for name in JSONBackend.available()]
+    if msgspec is not None:
+        backends.append(JSONBackend("msgspec", typed=True))
+
+    print(f"{'Page size:'.ljust(20)}{round(len(data) / 1024)}KiB")
+    for backend in backends:
+        elapsed = timeit.timeit(lambda: backend.loads_page(data), number=repeat) / repeat
+
+        tracemalloc.start()
+        page = backend.loads_page(data)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del page
+
+        name = backend.name + (" (typed)" if backend.typed else "")
+        print(f"{(name + ':').ljust(20)}{elapsed * 1000:.2f}ms/page  {retained / 1024:.0f}KiB/page")
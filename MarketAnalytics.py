@@ -0,0 +1,217 @@
+import heapq
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class MarketAnalytics:
+    # Market wide per item figures recomputed once per cycle from a Snapshot.
+    # With numpy live auctions are mirrored into columns (price, bin, start, end, count, item and category codes)
+    # and every item is computed in one batched pass, otherwise it falls back to a loop per item.
+    METRICS = ("auctions", "bins", "coins", "lowest_bin", "median_bin", "undercut")
+
+    def __init__(self, use_numpy: bool = None):
+        if use_numpy and np is None:
+            raise ValueError("numpy is not installed")
+
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        self.__columns = {}  # {item_id: (bucket, {column: array})} reused while the bucket is unchanged
+        # (({item_id: code}, {metric: values by code}), ({category: code}, {metric: values by code})) swapped whole
+        self.__report = (({}, {}), ({}, {}))
+
+    @staticmethod
+    def __item_columns(bucket) -> dict:
+        auctions = bucket.values()
+        size = len(bucket)
+        columns = {
+            "price": np.fromiter((auction.price for auction in auctions), np.int64, size),
+            "bin": np.fromiter((auction.bin for auction in auctions), np.bool_, size),
+            "start": np.fromiter((auction.start for auction in auctions), np.int64, size),
+            "end": np.fromiter((auction.end for auction in auctions), np.int64, size),
+            "count": np.fromiter((auction.count for auction in auctions), np.int32, size)
+        }
+        columns["bin_price"] = np.sort(columns["price"][columns["bin"]])  # sorted once per changed bucket
+        return columns
+
+    def mirror(self, snapshot, categories) -> tuple[list[str], list[str], dict]:
+        # (item_ids, category names, columns) where columns also hold "item" and "category" codes per row
+        # "bin_price" is separate: bin prices grouped by item in item_ids order and sorted within each item
+        # "item_category" is per item, the category code of each item_ids entry
+        index = snapshot.index
+        for item_id in [item_id for item_id in self.__columns if item_id not in index]:
+            del self.__columns[item_id]
+
+        item_ids = list(index)
+        for item_id in item_ids:
+            bucket = index[item_id]
+            cached = self.__columns.get(item_id)
+            if cached is None or cached[0] is not bucket:  # untouched buckets are shared between snapshots
+                self.__columns[item_id] = (bucket, self.__item_columns(bucket))
+
+        category_names = sorted({categories.category(item_id) for item_id in item_ids})
+        category_codes = {category: code for code, category in enumerate(category_names)}
+        item_categories = np.array([category_codes[categories.category(item_id)] for item_id in item_ids], np.int32)
+
+        parts = [self.__columns[item_id][1] for item_id in item_ids] or [self.__item_columns({})]
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        sizes = np.array([len(bucket) for bucket in index.values()], np.int64)
+        columns["item"] = np.repeat(np.arange(len(item_ids), dtype=np.int32), sizes)
+        columns["category"] = item_categories[columns["item"]]
+        columns["item_category"] = item_categories
+        return item_ids, category_names, columns
+
+    def update(self, snapshot, categories):
+        if self.use_numpy:
+            self.__report = self.__compute(snapshot, categories)
+        else:
+            self.__report = self.__compute_python(snapshot, categories)
+
+    def __compute(self, snapshot, categories) -> tuple:
+        item_ids, category_names, columns = self.mirror(snapshot, categories)
+        n = len(item_ids)
+        items = columns["item"]
+
+        # bin prices are one sorted run per item, so every per item figure is a lookup at run offsets
+        prices = columns["bin_price"]
+        bins = np.bincount(items[columns["bin"]], minlength=n)
+        starts = np.cumsum(bins) - bins
+        padded = np.append(prices, 0).astype(np.float64)  # keeps the lookups in range for items without bins
+
+        def at(positions, valid):
+            return np.where(valid, padded[np.minimum(positions, len(prices))], np.nan)
+
+        lowest = at(starts, bins > 0)
+        second = at(starts + 1, bins > 1)
+        item_metrics = {
+            "auctions": np.bincount(items, minlength=n),
+            "bins": bins,
+            "coins": np.bincount(items, weights=columns["price"], minlength=n),
+            "lowest_bin": lowest,
+            "median_bin": (at(starts + (bins - 1) // 2, bins > 0) + at(starts + bins // 2, bins > 0)) / 2,
+            "undercut": (second - lowest) / np.maximum(second, 1)  # how far below the next bin the lowest sits
+        }
+
+        m = len(category_names)
+        category = columns["category"]
+        category_lowest = np.full(m, np.inf)
+        np.minimum.at(category_lowest, columns["item_category"], np.where(bins > 0, lowest, np.inf))
+        category_metrics = {
+            "auctions": np.bincount(category, minlength=m),
+            "coins": np.bincount(category, weights=columns["price"], minlength=m),
+            "lowest_bin": np.where(np.isinf(category_lowest), np.nan, category_lowest)
+        }
+        return (
+            ({item_id: code for code, item_id in enumerate(item_ids)}, item_metrics),
+            ({name: code for code, name in enumerate(category_names)}, category_metrics)
+        )
+
+    def __compute_python(self, snapshot, categories) -> tuple:
+        item_codes = {}
+        item_metrics = {metric: [] for metric in self.METRICS}
+        category_codes = {}
+        category_metrics = {"auctions": [], "coins": [], "lowest_bin": []}
+        for item_id, bucket in snapshot.index.items():
+            prices = sorted(auction.price for auction in bucket.values() if auction.bin)
+            coins = sum(auction.price for auction in bucket.values())
+            n = len(prices)
+            item_codes[item_id] = len(item_codes)
+            for metric, value in (
+                    ("auctions", len(bucket)),
+                    ("bins", n),
+                    ("coins", coins),
+                    ("lowest_bin", prices[0] if n else None),
+                    ("median_bin", (prices[(n - 1) // 2] + prices[n // 2]) / 2 if n else None),
+                    ("undercut", (prices[1] - prices[0]) / max(prices[1], 1) if n > 1 else None)
+            ):
+                item_metrics[metric].append(value)
+
+            code = category_codes.setdefault(categories.category(item_id), len(category_codes))
+            if code == len(category_metrics["auctions"]):
+                for values in category_metrics.values():
+                    values.append(0 if values is not category_metrics["lowest_bin"] else None)
+            category_metrics["auctions"][code] += len(bucket)
+            category_metrics["coins"][code] += coins
+            lowest = category_metrics["lowest_bin"][code]
+            if n and (lowest is None or prices[0] < lowest):
+                category_metrics["lowest_bin"][code] = prices[0]
+        return (item_codes, item_metrics), (category_codes, category_metrics)
+
+    @staticmethod
+    def __value(value):
+        if np is not None and isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float):
+            if value != value:  # nan, the metric doesn't apply
+                return None
+            if value.is_integer():
+                return int(value)
+        return value
+
+    def __lookup(self, report: tuple, key: str) -> dict | None:
+        codes, metrics = report
+        code = codes.get(key)
+        if code is None:
+            return None
+        return {metric: self.__value(values[code]) for metric, values in metrics.items()}
+
+    def item(self, item_id: str) -> dict | None:
+        # auctions, bins, coins, lowest_bin, median_bin and undercut, None where they don't apply
+        return self.__lookup(self.__report[0], item_id)
+
+    def category(self, category: str) -> dict | None:
+        return self.__lookup(self.__report[1], category)
+
+    def leaderboard(self, metric: str = "auctions", limit: int = 10, ascending: bool = False) -> list[tuple]:
+        # [(item_id, value)] best first, items without the metric are left out
+        codes, metrics = self.__report[0]
+        item_ids = list(codes)
+        values = metrics.get(metric)
+        if values is None or not item_ids:
+            return []
+
+        if isinstance(values, list):
+            ranked = ((code, value) for code, value in enumerate(values) if value is not None)
+            pick = heapq.nsmallest if ascending else heapq.nlargest
+            top = [code for code, _ in pick(limit, ranked, key=lambda row: row[1])]
+        else:
+            values = values.astype(np.float64)
+            valid = np.flatnonzero(~np.isnan(values))
+            order = valid[np.argsort(values[valid] if ascending else -values[valid], kind="stable")]
+            top = order[:limit].tolist()
+        return [(item_ids[code], self.__value(values[code])) for code in top]
+
+
+if __name__ == "__main__":
+    # benchmark one analytics pass over a synthetic market
+    # usage: python MarketAnalytics.py [auctions] [items]
+    import random
+    import sys
+    import time
+    from types import MappingProxyType
+    from Auction import Auction
+    from CategoryTable import CategoryTable
+    from Snapshot import Snapshot
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    item_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    index = {}
+    for i in range(total):
+        item_id = f"ITEM_{int(random.paretovariate(1.2)) % item_count}"
+        auction = Auction(
+            f"{i:032x}", item_id, "Item", "RARE", 0, 1, random.randint(1, 10 ** 7), 0, random.random() < 0.8, 1, {}
+        )
+        index.setdefault(item_id, {})[auction.uuid] = auction
+    snapshot = Snapshot(0, MappingProxyType({item_id: MappingProxyType(bucket) for item_id, bucket in index.items()}))
+    categories = CategoryTable()
+
+    modes = [False] + ([True] if np is not None else [])
+    for use_numpy in modes:
+        analytics = MarketAnalytics(use_numpy)
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            analytics.update(snapshot, categories)
+            elapsed = time.perf_counter() - start
+            print(f"{('numpy' if use_numpy else 'python') + ' ' + label:<15}{round(elapsed * 1000, 1)}ms")
+        print(analytics.leaderboard("auctions", 3))
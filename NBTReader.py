@@ -0,0 +1,178 @@
+import struct
+import zlib
+
+
+class NBTReader:
+    # Single pass reader for the auction item_bytes payload.
+    # Works on offsets into the inflated buffer, so skipped tags never become objects.
+
+    # tag ids
+    TAG_END = 0
+    TAG_BYTE = 1
+    TAG_SHORT = 2
+    TAG_INT = 3
+    TAG_LONG = 4
+    TAG_FLOAT = 5
+    TAG_DOUBLE = 6
+    TAG_BYTE_ARRAY = 7
+    TAG_STRING = 8
+    TAG_LIST = 9
+    TAG_COMPOUND = 10
+    TAG_INT_ARRAY = 11
+    TAG_LONG_ARRAY = 12
+
+    __SCALARS = {
+        TAG_BYTE: struct.Struct(">b"),
+        TAG_SHORT: struct.Struct(">h"),
+        TAG_INT: struct.Struct(">i"),
+        TAG_LONG: struct.Struct(">q"),
+        TAG_FLOAT: struct.Struct(">f"),
+        TAG_DOUBLE: struct.Struct(">d"),
+    }
+    __SIZES = {tag_id: fmt.size for tag_id, fmt in __SCALARS.items()}
+    __ARRAYS = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+    __ARRAY_FMT = {TAG_INT_ARRAY: ">{}i", TAG_LONG_ARRAY: ">{}q"}
+    __LENGTH = struct.Struct(">i")
+    __NAME = struct.Struct(">H")
+
+    @classmethod
+    def __read_name(cls, data: bytes, pos: int) -> tuple[bytes, int]:
+        length = cls.__NAME.unpack_from(data, pos)[0]
+        pos += 2
+        return data[pos:pos + length], pos + length
+
+    @classmethod
+    def __skip(cls, data: bytes, pos: int, tag_id: int) -> int:
+        if tag_id in cls.__SIZES:
+            return pos + cls.__SIZES[tag_id]
+
+        match tag_id:
+            case cls.TAG_STRING:
+                return pos + 2 + cls.__NAME.unpack_from(data, pos)[0]
+            case cls.TAG_BYTE_ARRAY | cls.TAG_INT_ARRAY | cls.TAG_LONG_ARRAY:
+                return pos + 4 + cls.__LENGTH.unpack_from(data, pos)[0] * cls.__ARRAYS[tag_id]
+            case cls.TAG_LIST:
+                item_id = data[pos]
+                length = cls.__LENGTH.unpack_from(data, pos + 1)[0]
+                pos += 5
+                if item_id in cls.__SIZES:
+                    return pos + length * cls.__SIZES[item_id]
+                for _ in range(length):
+                    pos = cls.__skip(data, pos, item_id)
+                return pos
+            case cls.TAG_COMPOUND:
+                while (child_id := data[pos]) != cls.TAG_END:
+                    pos = cls.__skip(data, pos + 3 + cls.__NAME.unpack_from(data, pos + 1)[0], child_id)
+                return pos + 1
+            case _:
+                raise ValueError(f"Unrecognised tag type {tag_id}")
+
+    @classmethod
+    def __read(cls, data: bytes, pos: int, tag_id: int):
+        # values match Processor.nbt_to_dict on the equivalent nbt.TAG
+        if tag_id in cls.__SCALARS:
+            fmt = cls.__SCALARS[tag_id]
+            return fmt.unpack_from(data, pos)[0], pos + fmt.size
+
+        match tag_id:
+            case cls.TAG_STRING:
+                value, pos = cls.__read_name(data, pos)
+                return value.decode("utf-8"), pos
+            case cls.TAG_COMPOUND:
+                return cls.__read_compound(data, pos)
+            case cls.TAG_LIST:
+                item_id = data[pos]
+                length = cls.__LENGTH.unpack_from(data, pos + 1)[0]
+                pos += 5
+                if item_id in cls.__SCALARS:
+                    fmt = cls.__SCALARS[item_id]
+                    end = pos + length * fmt.size
+                    return [value for value, in fmt.iter_unpack(data[pos:end])], end
+
+                result = []
+                for _ in range(length):
+                    value, pos = cls.__read(data, pos, item_id)
+                    result.append(value)
+                return result, pos
+            case cls.TAG_BYTE_ARRAY:
+                length = cls.__LENGTH.unpack_from(data, pos)[0]
+                pos += 4
+                return str(bytearray(data[pos:pos + length])), pos + length
+            case cls.TAG_INT_ARRAY | cls.TAG_LONG_ARRAY:
+                length = cls.__LENGTH.unpack_from(data, pos)[0]
+                pos += 4
+                values = struct.unpack_from(cls.__ARRAY_FMT[tag_id].format(length), data, pos)
+                return list(values), pos + length * cls.__ARRAYS[tag_id]
+            case _:
+                raise ValueError(f"Unrecognised tag type {tag_id}")
+
+    @classmethod
+    def __read_compound(cls, data: bytes, pos: int, ignore=()) -> tuple[dict, int]:
+        result = {}
+        while (tag_id := data[pos]) != cls.TAG_END:
+            name, pos = cls.__read_name(data, pos + 1)
+            name = name.decode("utf-8")
+            if name in ignore or name in result:  # first duplicate wins, same as TAG_Compound lookups
+                pos = cls.__skip(data, pos, tag_id)
+            else:
+                result[name], pos = cls.__read(data, pos, tag_id)
+        return result, pos + 1
+
+    @classmethod
+    def __find(cls, data: bytes, pos: int, name: bytes) -> tuple[int, int]:
+        # position of the named child's payload within the compound starting at pos
+        while (tag_id := data[pos]) != cls.TAG_END:
+            child, pos = cls.__read_name(data, pos + 1)
+            if child == name:
+                return tag_id, pos
+            pos = cls.__skip(data, pos, tag_id)
+        raise KeyError(f"Tag {name.decode()} does not exist")
+
+    @classmethod
+    def read_item(cls, compressed: bytes, ignore=()) -> tuple[str, int, dict]:
+        data = zlib.decompress(compressed, 32 + zlib.MAX_WBITS)  # gzip header
+
+        # root compound -> "i" list -> first item compound
+        pos = 3 + cls.__NAME.unpack_from(data, 1)[0]
+        tag_id, pos = cls.__find(data, pos, b"i")
+        if tag_id != cls.TAG_LIST or data[pos] != cls.TAG_COMPOUND:
+            raise ValueError("Unexpected item_bytes layout")
+        item_pos = pos + 5
+
+        tag_id, pos = cls.__find(data, item_pos, b"Count")
+        count, _ = cls.__read(data, pos, tag_id)
+
+        _, pos = cls.__find(data, item_pos, b"tag")
+        _, pos = cls.__find(data, pos, b"ExtraAttributes")
+        extras, _ = cls.__read_compound(data, pos, ignore)
+
+        item_id = extras.pop("id")
+
+        return item_id, count, extras
+
+
+if __name__ == "__main__":
+    # benchmark against the nbt library path on recorded payloads
+    # usage: python NBTReader.py [auctions.json] [repeat]
+    import json
+    import sys
+    import timeit
+    from Processor import Processor
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "nutballs.json"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with open(path) as f:
+        payloads = [auction["item_bytes"] for auction in json.load(f)]
+
+    for raw_bytes in payloads:
+        assert Processor.decode(raw_bytes) == Processor.decode_nbt(raw_bytes), raw_bytes
+
+    results = {
+        "nbt": timeit.timeit(lambda: [Processor.decode_nbt(raw) for raw in payloads], number=repeat),
+        "NBTReader": timeit.timeit(lambda: [Processor.decode(raw) for raw in payloads], number=repeat),
+    }
+    total = len(payloads) * repeat
+    for name, elapsed in results.items():
+        print(f"{(name + ":").ljust(20)}{elapsed / total * 1e6:.1f}us/item")
+    print(f"{'Speedup:'.ljust(20)}{results['nbt'] / results['NBTReader']:.1f}x")
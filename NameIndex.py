@@ -0,0 +1,100 @@
+import bisect
+import heapq
+
+
+class NameIndex:
+    # Immutable autocomplete index over item display names, rebuilt only when the set of items changes.
+    # Prefix matches any word of the name via a sorted array + bisect, trigrams catch typos.
+    def __init__(self, names: dict = None):
+        self.__names = {}  # {item_id: display name}
+        self.__keys = []  # sorted (lowered name from a word start, item_id)
+        self.__trigrams = {}  # {trigram: {item_id}}
+        self.item_ids = frozenset()
+        if names:
+            self.__add(names)
+            self.__keys.sort()
+
+    def __add(self, names: dict):
+        for item_id, name in names.items():
+            self.__names[item_id] = name
+            lowered = name.lower()
+            start = 0
+            for word in lowered.split(" "):
+                if word:
+                    self.__keys.append((lowered[start:], item_id))
+                start += len(word) + 1
+
+            for trigram in self.trigrams(lowered):
+                self.__trigrams.setdefault(trigram, set()).add(item_id)
+        self.item_ids = frozenset(self.__names)
+
+    def updated(self, changes: dict) -> "NameIndex":
+        # new index with only {item_id: name} re-tokenised, a None name drops the item, this one stays untouched
+        index = NameIndex()
+        index.__names = {item_id: name for item_id, name in self.__names.items() if item_id not in changes}
+        index.__keys = [key for key in self.__keys if key[1] not in changes]
+        index.__trigrams = self.__trigrams.copy()  # inner sets are shared until touched
+
+        for item_id in changes:
+            if item_id not in self.__names:
+                continue
+            for trigram in self.trigrams(self.__names[item_id].lower()):
+                item_ids = index.__trigrams[trigram] = index.__trigrams[trigram] - {item_id}
+                if not item_ids:
+                    del index.__trigrams[trigram]
+
+        added = {item_id: name for item_id, name in changes.items() if name is not None}
+        for trigram in {trigram for name in added.values() for trigram in self.trigrams(name.lower())}:
+            if trigram in index.__trigrams:
+                index.__trigrams[trigram] = set(index.__trigrams[trigram])
+        index.__add(added)
+        index.__keys.sort()  # mostly sorted already
+        return index
+
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def prefix(self, query: str) -> set[str]:
+        query = query.lower()
+        start = bisect.bisect_left(self.__keys, (query,))
+        stop = bisect.bisect_left(self.__keys, (query + "\uffff",))
+        return {item_id for _, item_id in self.__keys[start:stop]}
+
+    def fuzzy(self, query: str, threshold: float = 0.4) -> dict[str, float]:
+        # {item_id: share of the query's trigrams found in the name}
+        query_trigrams = self.trigrams(query.lower())
+        hits = {}
+        for trigram in query_trigrams:
+            for item_id in self.__trigrams.get(trigram, ()):
+                hits[item_id] = hits.get(item_id, 0) + 1
+
+        return {
+            item_id: count / len(query_trigrams)
+            for item_id, count in hits.items() if count / len(query_trigrams) >= threshold
+        }
+
+    def search(self, query: str, counts, limit: int = 25, fuzzy: bool = True) -> list[str]:
+        # display names, prefix matches first, each group ranked by live auctions (counts: {item_id: bucket})
+        def popularity(item_id):
+            return len(counts.get(item_id, ()))
+
+        if not query:
+            return [self.__names[item_id] for item_id in heapq.nlargest(limit, self.__names, key=popularity)]
+
+        ranked = heapq.nlargest(limit, self.prefix(query), key=popularity)
+        if fuzzy and len(ranked) < limit:
+            found = set(ranked)
+            scores = self.fuzzy(query)
+            extra = heapq.nlargest(
+                limit - len(ranked),
+                (item_id for item_id in scores if item_id not in found),
+                key=lambda item_id: (scores[item_id], popularity(item_id))
+            )
+            ranked.extend(extra)
+
+        return [self.__names[item_id] for item_id in ranked]
@@ -0,0 +1,121 @@
+import bisect
+
+
+class PriceSeries:
+    # Sorted prices plus running sum and frequency buckets, so every statistic is O(1) or O(log n).
+    __slots__ = ("prices", "total", "frequency", "by_frequency", "max_frequency")
+
+    def __init__(self):
+        self.prices = []  # sorted
+        self.total = 0
+        self.frequency = {}  # {price: occurrences}
+        self.by_frequency = {}  # {occurrences: {prices}} for the mode
+        self.max_frequency = 0
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def add(self, price: int):
+        bisect.insort(self.prices, price)
+        self.total += price
+
+        count = self.frequency.get(price, 0)
+        if count:
+            self.__unbucket(price, count)
+        self.frequency[price] = count + 1
+        self.by_frequency.setdefault(count + 1, set()).add(price)
+        self.max_frequency = max(self.max_frequency, count + 1)
+
+    def remove(self, price: int) -> bool:
+        count = self.frequency.get(price)
+        if not count:
+            return False
+
+        del self.prices[bisect.bisect_left(self.prices, price)]
+        self.total -= price
+
+        self.__unbucket(price, count)
+        if count == 1:
+            del self.frequency[price]
+        else:
+            self.frequency[price] = count - 1
+            self.by_frequency.setdefault(count - 1, set()).add(price)
+        if self.max_frequency not in self.by_frequency:
+            self.max_frequency -= 1
+        return True
+
+    def __unbucket(self, price: int, count: int):
+        bucket = self.by_frequency[count]
+        bucket.discard(price)
+        if not bucket:
+            del self.by_frequency[count]
+
+    def mean(self) -> float:
+        return self.total / len(self.prices)
+
+    def median(self) -> float:
+        n = len(self.prices)
+        middle = n // 2
+        if n % 2:
+            return self.prices[middle]
+        return (self.prices[middle - 1] + self.prices[middle]) / 2
+
+    def mode(self) -> int:
+        return min(self.by_frequency[self.max_frequency])  # cheapest of any ties
+
+    def summary(self) -> dict | None:
+        if not self.prices:
+            return None
+
+        return {
+            "count": len(self.prices),
+            "min": self.prices[0],
+            "max": self.prices[-1],
+            "mean": self.mean(),
+            "median": self.median(),
+            "mode": self.mode()
+        }
+
+
+class PriceStats:
+    # {item_id: {"bin": PriceSeries, "auction": PriceSeries, "all": PriceSeries}} kept in step with the index
+    KINDS = ("bin", "auction", "all")
+
+    def __init__(self):
+        self.__items = {}
+
+    @staticmethod
+    def kind(auction) -> str:
+        return "bin" if auction.bin else "auction"
+
+    def add(self, auction):
+        series = self.__items.get(auction.item_id)
+        if series is None:
+            series = self.__items[auction.item_id] = {kind: PriceSeries() for kind in self.KINDS}
+
+        price = auction.price
+        series[self.kind(auction)].add(price)
+        series["all"].add(price)
+
+    def remove(self, auction):
+        series = self.__items.get(auction.item_id)
+        if series is None:
+            return
+
+        price = auction.price
+        if series[self.kind(auction)].remove(price):
+            series["all"].remove(price)
+        if not series["all"]:
+            del self.__items[auction.item_id]
+
+    def get_series(self, item_id: str, kind: str = "all") -> PriceSeries | None:
+        series = self.__items.get(item_id)
+        return series[kind] if series else None
+
+    def summary(self, item_id: str) -> dict | None:
+        # {"bin": {...}, "auction": {...}, "all": {...}} with count, min, max, mean, median and mode
+        series = self.__items.get(item_id)
+        if series is None:
+            return None
+
+        return {kind: series[kind].summary() for kind in self.KINDS}
@@ -1,12 +1,15 @@
 import base64
 import io
 from nbt import nbt
-from collections import defaultdict
+from Auction import Auction
+from CategoryTable import CategoryTable
+from NBTReader import NBTReader
 from Utilities import *
 
 
 class Processor:
     IGNORE_ATTRS = ("uuid", "timestamp", "bossId", "spawnedFor", "recipient_id")
+    KEEP_LORE = False  # store compressed item_lore on each Auction
 
     @classmethod
     def nbt_to_dict(cls, data: nbt.TAG):
@@ -33,6 +36,17 @@ class Processor:
 
     @classmethod
     def decode(cls, raw_bytes: str) -> tuple[str, int, dict]:
+        decoded = base64.b64decode(raw_bytes)
+        item_id, count, extras = NBTReader.read_item(decoded, cls.IGNORE_ATTRS)
+
+        if "gems" in extras:
+            extras["gems"] = cls.flatten_gems(extras["gems"])
+
+        return item_id, count, extras
+
+    @classmethod
+    def decode_nbt(cls, raw_bytes: str) -> tuple[str, int, dict]:
+        # reference path through the nbt library, kept for benchmarking NBTReader
         decoded = base64.b64decode(raw_bytes)
         file_obj = io.BytesIO(decoded)
         nbt_data: nbt.TAG_Compound = nbt.NBTFile(fileobj=file_obj)["i"][0]
@@ -51,54 +65,41 @@ class Processor:
         return item_id, count, extras
 
     @classmethod
-    async def process_item(cls, auction: dict) -> tuple[str, str]:
-        uuid = auction.pop("uuid")
-
-        raw_bytes = auction.pop("item_bytes")
-        item_id, count, auction["extras"] = cls.decode(raw_bytes)
-
-        auction["count"] = count
-
-        return uuid, item_id
+    def decode_many(cls, raw_items: list[str]) -> list[tuple[str, int, dict]]:
+        # batch entry point for Decoder workers, one call per shipped chunk
+        return [cls.decode(raw_bytes) for raw_bytes in raw_items]
 
     @classmethod
-    def update_attributes(cls, path, attr):
-        for k, v in attr.items():
-            match v:
-                case dict():
-                    if not isinstance(path[k], dict):
-                        path[k] = defaultdict(set)
-
-                    cls.update_attributes(path[k], v)
-                case list():
-                    if any(isinstance(item, dict) for item in v):
-                        if not isinstance(path[k], list):
-                            path[k] = list(path[k])
-                        path[k].extend(v)
-                    elif isinstance(path[k], list):
-                        path[k].extend(v)
-                    else:
-                        path[k].update(v)
-                case _:
-                    path[k].add(v)
+    def process_item(cls, auction: dict, decoded: tuple[str, int, dict]) -> Auction:
+        item_id, count, extras = decoded
+
+        return Auction.from_api(auction, item_id, count, extras, cls.KEEP_LORE)
 
     @classmethod
-    def get_category(cls, item_id: str, items):
-        if "category" in items.get(item_id, ()):
-            return items[item_id]["category"]
+    async def ingest(
+            cls, auctions: list, categories: CategoryTable, index: dict, attributes: dict, uuids: dict, decoder=None
+    ) -> list[Auction]:
+        # untimed, called once per page when streaming
+        raw_items = [auction.pop("item_bytes") for auction in auctions]
+        if decoder is None:
+            decoded = cls.decode_many(raw_items)
         else:
-            return item_id
+            decoded = await decoder.decode(raw_items)
 
-    @classmethod
-    @time_func("Process time")
-    async def process_auctions(cls, auctions: list, items: dict, index: dict, attributes: dict):
-        for auction in auctions:
-            uuid, item_id = await cls.process_item(auction)
-            index[item_id][uuid] = auction  # add auction to index
+        records = []
+        for auction, item in zip(auctions, decoded):
+            if auction["uuid"] in uuids:  # seen twice while pages shifted, don't count it again
+                continue
 
-            if not auction["extras"]:
+            record = cls.process_item(auction, item)
+            records.append(record)
+            index[record.item_id][record.uuid] = record  # add auction to index
+            uuids[record.uuid] = record.item_id  # reverse lookup for removal
+
+            if not record.extras:
                 continue
 
-            category = cls.get_category(item_id, items)
-            cls.update_attributes(attributes[category], auction["extras"])
+            attributes.add(categories.category(record.item_id), record.extras)
+
+        return records
 
@@ -0,0 +1,190 @@
+import math
+import random
+from types import MappingProxyType
+from AttributeIndex import AttributeIndex
+from Catalog import Catalog
+
+
+class KLLSketch:
+    # KLL quantile sketch, constant memory (at most about 3 * k values kept) and mergeable.
+    # Rank error is about 1.7% of the count at k=200 with 99% confidence, exact while count <= k.
+    __slots__ = ("k", "compactors", "count", "size", "max_size")
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.compactors = []  # level h holds values weighing 2 ** h
+        self.count = 0
+        self.size = 0
+        self.max_size = 0
+        self.__grow()
+
+    def __grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self.__capacity(h) for h in range(len(self.compactors)))
+
+    def __capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self.__compress()
+
+    def __compress(self):
+        for h, compactor in enumerate(self.compactors):
+            if len(compactor) < self.__capacity(h):
+                continue
+            if h + 1 == len(self.compactors):
+                self.__grow()
+
+            # keep every other value of the sorted level, starting at random, at twice the weight
+            compactor.sort()
+            leftover = compactor[-1:] if len(compactor) % 2 else []
+            promoted = compactor[random.getrandbits(1):len(compactor) - len(leftover):2]
+            self.compactors[h + 1].extend(promoted)
+            self.compactors[h] = leftover
+            self.size += len(leftover) + len(promoted) - len(compactor)
+            if self.size < self.max_size:
+                break
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.compactors) < len(other.compactors):
+            self.__grow()
+        for h, compactor in enumerate(other.compactors):
+            self.compactors[h].extend(compactor)
+        self.count += other.count
+        self.size = sum(len(compactor) for compactor in self.compactors)
+        while self.size >= self.max_size:
+            self.__compress()
+
+    def quantiles(self, qs) -> dict:
+        if not self.count:
+            return {}
+
+        weighted = sorted((value, 1 << h) for h, compactor in enumerate(self.compactors) for value in compactor)
+        total = sum(weight for _, weight in weighted)
+        result = {}
+        i = 0
+        seen = 0
+        for q in sorted(qs):
+            target = q * total
+            while i < len(weighted) - 1 and seen + weighted[i][1] <= target:
+                seen += weighted[i][1]
+                i += 1
+            result[q] = weighted[i][0]
+        return result
+
+
+class QuantileSketches:
+    # BIN price sketches per item_id and per (item_id, path, value) of popular attribute values.
+    # Sketches can't forget a value, so removals are counted and a sketch is rebuilt from the live auctions
+    # once they pass STALE of its size. Estimates are off by at most the sketch error plus that share in rank.
+    QUANTILES = (0.1, 0.5, 0.9)
+    POPULAR = 30  # live auctions an attribute value needs to get its own sketch
+    STALE = 0.1
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.__sketches = {}  # {item_id: {() | (path, value): [KLLSketch, removed]}}
+        self.__touched = set()  # (item_id, *sub key) changed since the last publish
+        self.__dirty = set()  # item_ids whose attribute sketches need checking
+        self.estimates = MappingProxyType({})  # {(item_id, *sub key): {"count", 0.1, 0.5, 0.9}}, replaced
+
+    @staticmethod
+    def __sub_keys(auction):
+        yield ()
+        if auction.extras:
+            yield from Catalog.walk(auction.extras)
+
+    def add(self, auction):
+        self.__dirty.add(auction.item_id)
+        if not auction.bin:
+            return
+
+        sketches = self.__sketches.setdefault(auction.item_id, {})
+        if () not in sketches:  # maintain may have given popular values of non-bins their sketches first
+            sketches[()] = [KLLSketch(self.k), 0]
+        for sub_key in self.__sub_keys(auction):
+            entry = sketches.get(sub_key)
+            if entry is not None:
+                entry[0].add(auction.price)
+                self.__touched.add((auction.item_id, *sub_key))
+
+    def remove(self, auction):
+        self.__dirty.add(auction.item_id)
+        sketches = self.__sketches.get(auction.item_id)
+        if not auction.bin or sketches is None:
+            return
+
+        for sub_key in self.__sub_keys(auction):
+            entry = sketches.get(sub_key)
+            if entry is not None:
+                entry[1] += 1
+                self.__touched.add((auction.item_id, *sub_key))
+
+    def __build(self, item_id: str, sub_key: tuple, auctions):
+        sketch = KLLSketch(self.k)
+        for auction in auctions:
+            if auction.bin:
+                sketch.add(auction.price)
+        self.__sketches.setdefault(item_id, {})[sub_key] = [sketch, 0]
+        self.__touched.add((item_id, *sub_key))
+
+    def maintain(self, index: dict, attribute_index) -> int:
+        # creates, drops and rebuilds the sketches of items changed since the last call, returns rebuilds
+        rebuilt = 0
+        for item_id in self.__dirty:
+            auctions = index.get(item_id)
+            sketches = self.__sketches.get(item_id, {})
+            if not auctions:
+                self.__touched.update((item_id, *sub_key) for sub_key in sketches)
+                self.__sketches.pop(item_id, None)
+                continue
+
+            counts = attribute_index.counts(item_id)
+            unpopular = [sub_key for sub_key in sketches if sub_key and counts.get(sub_key, 0) < self.POPULAR // 2]
+            for sub_key in unpopular:
+                del sketches[sub_key]
+                self.__touched.add((item_id, *sub_key))
+
+            for sub_key, live in counts.items():
+                if live >= self.POPULAR and sub_key not in sketches:
+                    uuids = attribute_index.lookup(item_id, *sub_key)
+                    self.__build(item_id, sub_key, (auctions[uuid] for uuid in uuids))
+                    rebuilt += 1
+
+            for sub_key, (sketch, removed) in list(self.__sketches.get(item_id, {}).items()):
+                if removed > self.STALE * max(1, len(sketch) - removed):
+                    uuids = attribute_index.lookup(item_id, *sub_key) if sub_key else auctions
+                    self.__build(item_id, sub_key, (auctions[uuid] for uuid in uuids))
+                    rebuilt += 1
+
+        self.__dirty = set()
+        return rebuilt
+
+    def publish(self):
+        # estimates of changed keys are recomputed, the rest are shared with the previous mapping
+        estimates = dict(self.estimates)
+        for key in self.__touched:
+            entry = self.__sketches.get(key[0], {}).get(key[1:])
+            if entry is None or len(entry[0]) - entry[1] <= 0:
+                estimates.pop(key, None)
+                continue
+
+            sketch, removed = entry
+            estimates[key] = {"count": len(sketch) - removed, **sketch.quantiles(self.QUANTILES)}
+        self.__touched = set()
+
+        self.estimates = MappingProxyType(estimates)
+        return self.estimates
+
+    def estimate(self, item_id: str, attribute=None, value=None) -> dict | None:
+        # None when there is no sketch, e.g. the value isn't popular enough
+        key = (item_id,) if attribute is None else (item_id, AttributeIndex.path(attribute), Catalog.canonical(value))
+        return self.estimates.get(key)
@@ -1,94 +1,421 @@
 import asyncio
+import heapq
 from collections import defaultdict
 from threading import Thread
 import json
+from AttributeIndex import AttributeIndex
+from Catalog import Catalog
+from CategoryTable import CategoryTable
+from Decoder import Decoder
+from Expiry import Expiry
+from MarketAnalytics import MarketAnalytics
+from NameIndex import NameIndex
+from PriceStats import PriceStats
 from Processor import Processor
-from Scrapper import Scrapper
+from QuantileSketch import QuantileSketches
+from SalesHistory import SalesHistory
+from Scheduler import Scheduler
+from Scrapper import FetchError, Scrapper
+from Snapshot import EMPTY, Snapshot
+from SortIndex import SortIndex
+from StateFile import StateFile
 from Utilities import *
+from Watchlist import Watch, Watchlist
 
 
 class SBAuctions:
-    __INTERVAL = 60 - 1  # to recalibrate
-    __OFFSET = 14  # to account for initial update times
+    __EXPIRY_GRACE = 60 * 1000  # ms past end before evicting locally, lets auctions_ended report sales first
+    __MAX_STATE_AGE = 60 * 60  # older saved states hold too few live auctions to beat decoding them all again
+    __ITEMS_INTERVAL = 10 * 60  # items resource rarely changes, checked on its own schedule
+    __BID_WATCH = 500  # soonest ending non-bin auctions considered for bid refreshes each cycle
+    __BID_PAGES = 4  # pages re-read for them at most
 
-    def __init__(self):
+    def __init__(self, decode_mode: str = "inline", decode_workers: int = None, state_path: str = "state.bin"):
         self.scrapper = Scrapper()
+        self.decoder = Decoder(decode_mode, decode_workers)
+        self.state = StateFile(state_path) if state_path else None
+        self.scheduler = Scheduler()
 
         self.__items = None
         self.__index = defaultdict(dict)
-        self.__attributes = defaultdict(lambda: defaultdict(set))  # {"sword": {"lvl": (1, 2, 3...)}}
+        self.__attributes = Catalog()  # {"sword": {("lvl",): Counter({1: 3, 2: 5...})}}
+        self.__uuids = {}  # {uuid: item_id}
+        self.__bidding = {}  # {uuid: end} of live non-bin auctions
+        self.categories = CategoryTable()  # item_id <-> category and live per category aggregates
+        self.expiry = Expiry()
+        self.attribute_index = AttributeIndex()
+        self.price_stats = PriceStats()
+        self.sort_index = SortIndex()
+        self.sketches = QuantileSketches()  # BIN price quantiles per item and popular attribute value
+        self.market = MarketAnalytics()  # numpy when installed
+        self.watchlist = Watchlist()  # matched against newly listed auctions only
+        self.sales = SalesHistory()  # sold prices from auctions_ended, kept in memory only
+        self.name_index = NameIndex()  # immutable, replaced whenever the set of live items changes
+        self.__items_checked = 0.0  # monotonic time of the last items check
+        self.__renamed = set()  # item_ids whose display name changed since the last publish
+        self.__stale_categories = set()  # categories items moved out of since the last publish
+        self.__name_cache = {}  # {(generation, query, limit): names}, autocomplete repeats the same prefixes a lot
+        self.removal_stats = {"ended": 0, "expired": 0, "unknown": 0}  # last cycle, per removal path
+
+        # readers only ever see published snapshots, the dicts above belong to the scrapper thread
+        self.__snapshot = Snapshot()
+        self.__dirty = set()  # item_ids changed since the last publish
+
+    def __remove(self, uuid: str, index: dict, uuids: dict) -> bool:
+        item_id = uuids.pop(uuid, None)
+        if item_id is None:
+            return False
+
+        auctions = index[item_id]
+        auction = auctions.pop(uuid)
+        self.expiry.discard(uuid)
+        if not auction.bin:
+            self.__bidding.pop(uuid, None)
+            self.scrapper.forget(uuid)
+        self.price_stats.remove(auction)
+        self.sort_index.remove(auction)
+        self.categories.remove(auction)
+        self.sketches.remove(auction)
+        if auction.extras:
+            self.__attributes.remove(self.get_category(item_id), auction.extras)
+            self.attribute_index.remove(item_id, uuid, auction.extras)
+        self.__dirty.add(item_id)
+        if not auctions:  # drop empty buckets so they don't linger in item names
+            del index[item_id]
+        return True
 
     @time_func("Remove ended")
-    async def __remove_auctions(self, ended: list, index: dict) -> None:
+    async def __remove_auctions(self, ended: list, index: dict, uuids: dict) -> int:
         # remove ended from active auctions
+        removed = 0
         for uuid in ended:
-            for item_id in index:  # for every item_id
-                if uuid in index[item_id]:  # if auction item is this item type
-                    del index[item_id][uuid]
-                    break
+            if self.__remove(uuid, index, uuids):
+                removed += 1
             else:
                 # first sync gets all current
                 # next sync removes ended from those
                 # repeat
                 # should only occur when started and ended in between
+                self.removal_stats["unknown"] += 1
                 with open("ended.txt", "a") as f:
                     f.write(uuid + "\n")
                 # print("ended not in db")
 
+        self.removal_stats["ended"] += removed
+        return removed
+
+    @time_func("Expire auctions")
+    async def __expire_auctions(self, now: int, index: dict, uuids: dict) -> int:
+        # catches what auctions_ended never reports (unsold, or ended during a missed cycle)
+        expired = 0
+        for uuid in self.expiry.pop_expired(now - self.__EXPIRY_GRACE):
+            if self.__remove(uuid, index, uuids):  # already gone if it was in auctions_ended
+                expired += 1
+
+        self.removal_stats["expired"] += expired
+        return expired
+
     @time_func("Update time")
     async def __update(self) -> None:
         print("\nStarting update")
 
-        async with self.scrapper:
-            # update items index
-            self.__items = await self.scrapper.get_items()
-
-            # shrink dicts first to save memory
-            ended: list = await self.scrapper.get_ended()
-            await self.__remove_auctions(ended, self.__index)
-
-            # update dicts
-            auction_uuids = [auction for auctions in self.__index.values() for auction in auctions]
-            new: list = await self.scrapper.get_new(auction_uuids)
-            await Processor.process_auctions(new, self.__items, self.__index, self.__attributes)
+        # update items index
+        await self.__refresh_items()
+
+        # shrink dicts first to save memory
+        self.removal_stats = dict.fromkeys(self.removal_stats, 0)
+        # small payload, doubles as the probe for whether the next publish is out yet
+        ended_auctions: list = await self.scrapper.get_ended_auctions()
+        self.scheduler.observe(self.scrapper.get_last_updated(), time.time(), self.scrapper.get_waited())
+        await self.__record_sales(ended_auctions)  # before removal, known auctions need no decoding
+
+        ended = [auction["auction_id"] for auction in ended_auctions]
+        await self.__remove_auctions(ended, self.__index, self.__uuids)
+        await self.__expire_auctions(self.scrapper.get_last_updated(), self.__index, self.__uuids)
+        print(f"{'Removed:'.ljust(20)}{self.removal_stats}")
+
+        # update dicts, pages are processed as they arrive
+        await self.__consume(self.scrapper.iter_new(self.__uuids), alert=True)
+        await self.__refresh_bids()
+        print(f"{'Fetch metrics:'.ljust(20)}{self.scrapper.get_metrics()}")
+
+        self.__publish()
+        self.scheduler.record_freshness(self.__snapshot.generation)
+        print(f"{'Schedule metrics:'.ljust(20)}{self.scheduler.get_metrics()}")
+        await self.__analyse()
+        await self.__persist()
+
+    @time_func("Market analytics")
+    async def __analyse(self):
+        self.market.update(self.__snapshot, self.categories)
+
+    @time_func("Record sales")
+    async def __record_sales(self, ended_auctions: list) -> int:
+        fresh = self.sales.fresh([auction["auction_id"] for auction in ended_auctions])
+        unknown = []
+        for auction in ended_auctions:
+            uuid = auction["auction_id"]
+            if uuid not in fresh:
+                continue
+
+            item_id = self.__uuids.get(uuid)
+            if item_id is None:
+                unknown.append(auction)
+                continue
+
+            count = self.__index[item_id][uuid].count
+            self.sales.add(item_id, auction["timestamp"], auction["price"], count, auction["bin"])
+
+        if unknown:
+            decoded = await self.decoder.decode([auction["item_bytes"] for auction in unknown])
+            for auction, (item_id, count, _) in zip(unknown, decoded):
+                self.sales.add(item_id, auction["timestamp"], auction["price"], count, auction["bin"])
+
+        self.sales.trim(self.scrapper.get_last_updated())
+        print(f"{'Sales:'.ljust(20)}{len(fresh)} ({len(unknown)} decoded)")
+        return len(fresh)
+
+    async def __refresh_items(self, force: bool = False):
+        if not force and time.monotonic() - self.__items_checked < self.__ITEMS_INTERVAL:
+            return
+        self.__items_checked = time.monotonic()
+
+        items = await self.scrapper.get_items(force)
+        if items is None:
+            print(f"{'Items:'.ljust(20)}unchanged")
+            return
+
+        old = self.__items or {}
+        changed = [item_id for item_id in old.keys() | items.keys() if old.get(item_id) != items.get(item_id)]
+        self.__items = items
+        for item_id in changed:
+            if old.get(item_id, {}).get("name") != items.get(item_id, {}).get("name"):
+                self.__renamed.add(item_id)
+
+        # attribute counts and aggregates live under the category, move them along with the item
+        for item_id, category in self.categories.update(items, changed).items():
+            auctions = self.__index.get(item_id)
+            if not auctions:
+                continue
+
+            self.__stale_categories.add(category)
+            self.__dirty.add(item_id)
+            for auction in auctions.values():
+                self.categories.remove(auction, category)
+                self.categories.add(auction)
+                if auction.extras:
+                    self.__attributes.remove(category, auction.extras)
+                    self.__attributes.add(self.get_category(item_id), auction.extras)
+
+        print(f"{'Items changed:'.ljust(20)}{len(changed)}")
+
+    @time_func("Fetch and process")
+    async def __consume(self, pages, alert: bool = False) -> int:
+        # alert on deltas only, a full sync would match every listing already on the market
+        count = 0
+        alerts = 0
+        async for auctions in pages:
+            records = await Processor.ingest(
+                auctions, self.categories, self.__index, self.__attributes, self.__uuids, self.decoder
+            )
+            for record in records:
+                self.__track(record)
+            if alert:
+                alerts += len(self.watchlist.match(records, self.get_category))
+            count += len(records)
+
+        print(f"{'Processed:'.ljust(20)}{count}")
+        if alert:
+            print(f"{'Alerts:'.ljust(20)}{alerts}")
+        return count
+
+    @time_func("Refresh bids")
+    async def __refresh_bids(self) -> int:
+        # non-bins keep their page, re-read the pages holding the ones ending soonest and update their bids
+        now = self.scrapper.get_last_updated()
+        soonest = heapq.nsmallest(
+            self.__BID_WATCH, ((end, uuid) for uuid, end in self.__bidding.items() if end > now)
+        )
+        pages = []
+        for _, uuid in soonest:
+            page_num = self.scrapper.get_position(uuid)
+            if page_num is not None and page_num not in pages:
+                pages.append(page_num)
+                if len(pages) == self.__BID_PAGES:
+                    break
 
-    def __save(self, auctions: list):
-        with open("samples/raw.json", "w") as f:
-            json.dump(auctions, f, indent=2)
+        updated = 0
+        try:
+            async for _, auctions in self.scrapper.iter_pages(pages):
+                for auction in auctions:
+                    uuid = auction["uuid"]
+                    item_id = None if auction["bin"] else self.__uuids.get(uuid)
+                    if item_id is None:
+                        continue
+
+                    record = self.__index[item_id][uuid]
+                    bid = auction.get("highest_bid_amount", 0)
+                    if bid != record.highest_bid_amount:
+                        self.__update_bid(record, bid)
+                        updated += 1
+        except FetchError as e:  # a newer publish landed mid cycle, the next one picks it up
+            print(e)
+
+        print(f"{'Bid updates:'.ljust(20)}{updated} ({len(pages)} pages)")
+        return updated
+
+    def __update_bid(self, record, bid: int):
+        # only price fields change, item_bytes aren't decoded again
+        new_record = record.with_bid(bid)
+        self.__index[record.item_id][record.uuid] = new_record
+        self.__dirty.add(record.item_id)
+        for structure in (self.price_stats, self.sort_index, self.categories):
+            structure.remove(record)  # the old record still carries the old price
+            structure.add(new_record)
+
+    def __track(self, record):
+        # side structures of a newly indexed auction
+        self.__dirty.add(record.item_id)
+        if not record.bin:
+            self.__bidding[record.uuid] = record.end
+        self.expiry.add(record.end, record.uuid)
+        self.price_stats.add(record)
+        self.sort_index.add(record)
+        self.categories.add(record)
+        self.sketches.add(record)
+        if record.extras:
+            self.attribute_index.add(record.item_id, record.uuid, record.extras)
+
+    def __publish(self, generation: int = None):
+        if generation is None:
+            generation = self.scrapper.get_last_updated()
+
+        categories = {self.get_category(item_id) for item_id in self.__dirty} | self.__stale_categories
+        self.sketches.maintain(self.__index, self.attribute_index)
+        self.sketches.publish()
+        snapshot = self.__snapshot.patch(
+            generation, self.__index, self.__attributes, self.price_stats, self.categories, self.__dirty, categories
+        )
+        self.__dirty = set()
+        self.__stale_categories = set()
+
+        self.__snapshot = snapshot  # single reference swap, readers keep whichever they already hold
+        print(f"{'Published:'.ljust(20)}{snapshot.generation}")
+
+        # only items that came, went or were renamed are re-indexed
+        live = set(snapshot.index)
+        changes = dict.fromkeys(self.name_index.item_ids - live)
+        for item_id in (live - self.name_index.item_ids) | (self.__renamed & live):
+            changes[item_id] = self.get_item_name(item_id)
+        if changes:
+            self.name_index = self.name_index.updated(changes)
+            print(f"{'Item names:'.ljust(20)}{len(self.name_index)} ({len(changes)} changed)")
+        self.__renamed = set()
+        self.__name_cache = {}
+
+    @time_func("Save state")
+    async def __persist(self):
+        if self.state is None:
+            return
+
+        # the writer is paused on this await, so the dicts can't change under the dump
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(
+            None, self.state.dump, self.__snapshot.generation, self.__index, self.__attributes
+        )
+        print(f"{'State size:'.ljust(20)}{round(size / 1024 / 1024, 1)}MiB")
+
+    @time_func("Load state")
+    async def __restore(self) -> bool:
+        if self.state is None:
+            return False
+
+        state = self.state.load()
+        if state is None:
+            return False
+
+        generation, index, attributes = state
+        age = time.time() - generation / 1000
+        if age > self.__MAX_STATE_AGE:
+            print(f"Saved state is {int(age)}s old, doing a full sync")
+            return False
+
+        self.__index = defaultdict(dict, index)
+        self.__attributes = attributes
+        self.__uuids = {}
+        self.__bidding = {}
+        self.expiry = Expiry()
+        self.attribute_index = AttributeIndex()
+        self.price_stats = PriceStats()
+        self.sort_index = SortIndex()
+        self.categories = CategoryTable(self.__items)
+        self.sketches = QuantileSketches()
+        for item_id, auctions in index.items():
+            for uuid, auction in auctions.items():
+                self.__uuids[uuid] = item_id
+                self.__track(auction)
+
+        self.__dirty = set(self.__index)
+        self.__publish(generation)
+        return True
+
+    @time_func("Reconcile state")
+    async def __reconcile(self) -> int:
+        # auctions_ended only covers the last minute, what sold or ended while down is found by not being listed
+        listed = set()
+
+        async def unknown():
+            async for auctions in self.scrapper.iter_auctions():
+                listed.update(auction["uuid"] for auction in auctions)
+                new_auctions = [auction for auction in auctions if auction["uuid"] not in self.__uuids]
+                if new_auctions:  # restored ones are kept as they are, only these get decoded
+                    yield new_auctions
+
+        await self.__consume(unknown())
+        gone = [uuid for uuid in self.__uuids if uuid not in listed]
+        for uuid in gone:
+            self.__remove(uuid, self.__index, self.__uuids)
+
+        print(f"{'Not listed:'.ljust(20)}{len(gone)}")
+        return len(gone)
+
+    def __save(self):
         with open("samples/items.json", "w") as f:
             json.dump(self.__items, f, indent=2)
         with open("samples/index.json", "w") as f:
             json.dump(format_output(self.__index), f, indent=2)
         with open("samples/attributes.json", "w") as f:
-            json.dump(format_output(self.__attributes), f, indent=2)
-
-    def __calc_delay(self) -> int:
-        current_time: float = time.time()
-        next_update: float = (
-                (self.scrapper.get_last_updated() / 1000) + self.__INTERVAL + self.__OFFSET
-        )
-
-        return int(next_update - current_time)
+            json.dump(format_output(self.__snapshot.attributes), f, indent=2)
 
     async def controller(self) -> None:
+        # session stays open across cycles so connections are reused
         async with self.scrapper:
-            self.__items = await self.scrapper.get_items()
-            auctions = await self.scrapper.get_auctions()
-            await Processor.process_auctions(auctions, self.__items, self.__index, self.__attributes)
+            # categories are needed to place restored or fetched auctions
+            await self.__refresh_items(force=True)
+            if await self.__restore():
+                # warm restart, one page scan instead of decoding every auction again
+                await self.__reconcile()
+                self.__publish()
+                await self.__analyse()
+                await self.__persist()
+            else:
+                await self.__consume(self.scrapper.iter_auctions())
+                self.__publish()
+                await self.__analyse()
+                await self.__persist()
 
-        # Output db for debug
-        self.__save(auctions)
+                # Output db for debug
+                self.__save()
 
-        # calibration
-        difference = self.__calc_delay()
-        print(f"Sleeping for:\t{difference}s")
-        await asyncio.sleep(difference)
+            self.scheduler.observe(self.__snapshot.generation)  # when it was first seen is unknown here
 
-        while True:
-            await self.__update()
+            while True:
+                # next publish is predicted from the ones seen so far, not from when the last cycle ended
+                delay = self.scheduler.delay()
+                print(f"Sleeping for:\t{round(delay, 1)}s")
+                await asyncio.sleep(delay)
 
-            print(f"Sleeping for:\t{self.__INTERVAL}s")
-            await asyncio.sleep(self.__INTERVAL)
+                await self.__update()
 
     def __start_loop(self):
         loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
@@ -103,40 +430,175 @@ class SBAuctions:
         thread.start()
 
     def get_item_name(self, item_id: str) -> str:
-        if item_id in self.__items:
+        if self.__items and item_id in self.__items:
             return self.__items[item_id]["name"]
 
         return " ".join([word.capitalize() for word in item_id.split("_")])
 
-    def get_item_names(self):
-        item_names = [self.get_item_name(item_id) for item_id in self.__index]
+    def get_item_names(self, query: str = "", limit: int = 25) -> list[str]:
+        # prefix matches on any word then fuzzy ones, most live auctions first
+        snapshot, cache = self.__snapshot, self.__name_cache
+        key = (snapshot.generation, query.lower().strip(), limit)
+        item_names = cache.get(key)
+        if item_names is None:
+            item_names = self.name_index.search(key[1], snapshot.index, limit)
+            if len(cache) < 4096:
+                cache[key] = item_names
 
-        return item_names
+        return list(item_names)
 
     def get_category(self, item_id: str):
-        if "category" in self.__items.get(item_id, ()):
-            return self.__items[item_id]["category"]
-        else:
-            return item_id
+        category = self.categories.category(item_id)
+        return category
+
+    def get_category_items(self, category: str) -> frozenset:
+        item_ids = self.categories.items(category)
+        return item_ids
+
+    def get_category_stats(self, category: str) -> dict | None:
+        # count, bins, lowest_bin and bin price quantiles as of the current snapshot
+        stats = self.__snapshot.category_stats.get(category)
+        return stats
+
+    def get_cheapest(self, category: str, limit: int = 10) -> list:
+        # lowest bins across every item of the category, e.g. the cheapest sword
+        snapshot = self.__snapshot
+        auctions = []
+        for uuid in self.categories.cheapest(category, limit):
+            auction = snapshot.index.get(self.__uuids.get(uuid), EMPTY).get(uuid)
+            if auction is not None:  # the table may be ahead of the snapshot
+                auctions.append(auction)
+        return auctions
+
+    def get_snapshot(self) -> Snapshot:
+        # hold on to this for several reads from the same generation
+        return self.__snapshot
 
     def get_attributes(self, item_id: str):
         category = self.get_category(item_id)
-        attributes = self.__attributes[category].keys()
+        attributes = self.__snapshot.attributes.get(category, EMPTY).keys()
 
         return attributes
 
+    def get_attribute_frequencies(self, item_id: str, attribute: str) -> dict:
+        # {value: live auctions}, or {sub attribute: {value: live auctions}} for nested attributes
+        category = self.get_category(item_id)
+        frequencies = self.__snapshot.frequencies.get(category, EMPTY)
+
+        result = {}
+        for path, values in frequencies.items():
+            if path[0] != attribute:
+                continue
+            if len(path) == 1:
+                result.update(values)
+            else:
+                result[".".join(path[1:])] = values
+        return result
+
     def get_attribute_values(self, item_id: str, attribute: str):
-        values = self.__index[item_id]["attributes"][attribute]
+        category = self.get_category(item_id)
+        values = self.__snapshot.attributes.get(category, EMPTY).get(attribute, ())
         return values
 
+    def get_sales(self, item_id: str, days: float = 1) -> dict | None:
+        # open, high, low, close, sales, items, coins and mean over the last days, from rollups
+        summary = self.sales.summary(item_id, days)
+        return summary
+
+    def get_sales_history(self, item_id: str, resolution: str = "1h", since: int = None) -> list[tuple]:
+        # (start, open, high, low, close, sales, items, coins) per 1m, 1h or 1d bucket
+        history = self.sales.history(item_id, resolution, since)
+        return history
+
+    def get_auction(self, uuid: str):
+        item_id = self.__uuids.get(uuid)
+        if item_id is None:
+            return None
+
+        return self.__snapshot.index.get(item_id, EMPTY).get(uuid)
+
     def get_auctions(self, item_id: str):
-        auctions = self.__index[item_id].copy()
+        # read-only view, no copy needed
+        auctions = self.__snapshot.index.get(item_id, EMPTY)
         return auctions
 
+    def get_price_stats(self, item_id: str, bin: bool = None) -> dict | None:
+        # count, min, max, mean, median and mode as of the current snapshot
+        stats = self.__snapshot.stats.get(item_id)
+        if stats is None:
+            return None
+
+        kind = "all" if bin is None else "bin" if bin else "auction"
+        return stats[kind]
+
+    def estimate_price(self, item_id: str, attribute=None, value=None) -> dict | None:
+        # {"count", 0.1, 0.5, 0.9} of BIN prices, e.g. estimate_price("TERMINATOR", "enchantments.ultimate_wise", 5)
+        estimate = self.sketches.estimate(item_id, attribute, value)
+        if estimate is not None or attribute is None:
+            return estimate
+
+        # values too rare for a sketch are few enough to sort
+        auctions = self.find_auctions(item_id, [(attribute, value)])
+        prices = sorted(auction.price for auction in auctions if auction.bin)
+        if not prices:
+            return None
+        return {
+            "count": len(prices),
+            **{q: prices[min(len(prices) - 1, int(q * len(prices)))] for q in QuantileSketches.QUANTILES}
+        }
+
+    def get_market(self, item_id: str) -> dict | None:
+        # auctions, bins, coins, lowest_bin, median_bin and undercut as of the last cycle
+        report = self.market.item(item_id)
+        return report
+
+    def get_leaderboard(self, metric: str = "auctions", limit: int = 10, ascending: bool = False) -> list[tuple]:
+        # [(item_id, value)] for one of MarketAnalytics.METRICS
+        leaderboard = self.market.leaderboard(metric, limit, ascending)
+        return leaderboard
+
+    def get_auction_page(
+            self, item_id: str, sort: str = "Lowest Price", limit: int = 10,
+            offset: int = 0, after: tuple = None, before: tuple = None
+    ) -> tuple[list, dict]:
+        # sort is one of SortIndex.SORTS, pass page["next"] / page["previous"] back as after / before
+        auctions = self.__snapshot.index.get(item_id, EMPTY)
+        uuids, page = self.sort_index.page(item_id, sort, limit, offset, after, before)
+
+        # the sort index may be ahead of the snapshot, skip rows this generation doesn't hold yet
+        return [auctions[uuid] for uuid in uuids if uuid in auctions], page
+
+    def find_auctions(self, item_id: str, all_of=(), any_of=()) -> list:
+        # e.g. all_of=[("ultimate_wise", 5), ("hot_potato_count", slice(10, None))]
+        auctions = self.__snapshot.index.get(item_id, EMPTY)
+        uuids = self.attribute_index.query(item_id, all_of, any_of)
+        if uuids is None:
+            return list(auctions.values())
+
+        # the index may be ahead of the snapshot, only return what this generation holds
+        return [auctions[uuid] for uuid in uuids if uuid in auctions]
+
+    def add_watch(
+            self, item_id: str = None, category: str = None, conditions=(), max_price: int = None,
+            bin_only: bool = True, owner=None
+    ) -> Watch:
+        # e.g. add_watch("TERMINATOR", conditions=[("enchantments.ultimate_wise", 5)], max_price=500_000_000)
+        watch = self.watchlist.add(Watch(item_id, category, conditions, max_price, bin_only, owner))
+        return watch
+
+    def remove_watch(self, watch_id: int) -> bool:
+        removed = self.watchlist.remove(watch_id)
+        return removed
+
+    def get_alerts(self) -> asyncio.Queue:
+        # call from the consuming event loop, yields (Watch, Auction) as new listings match
+        queue = self.watchlist.queue()
+        return queue
+
     def get_index(self):
         # For the love of god please don't use this
         # FOR DEBUGGING ONLY
-        index = self.__index.copy()
+        index = self.__snapshot.index
         return index
 
 
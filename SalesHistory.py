@@ -0,0 +1,163 @@
+import bisect
+import time
+from array import array
+
+
+class SalesRing:
+    # Fixed capacity columns of the latest raw sales of one item, the oldest row is overwritten when full.
+    __slots__ = ("timestamps", "prices", "counts", "bins", "head", "size")
+
+    def __init__(self, capacity: int):
+        self.timestamps = array("q", bytes(8 * capacity))
+        self.prices = array("q", bytes(8 * capacity))
+        self.counts = array("i", bytes(4 * capacity))
+        self.bins = array("b", bytes(capacity))
+        self.head = 0  # next row written
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: int, price: int, count: int, bin: bool):
+        i = self.head
+        self.timestamps[i] = timestamp
+        self.prices[i] = price
+        self.counts[i] = count
+        self.bins[i] = bin
+        self.head = (i + 1) % len(self.prices)
+        self.size = min(self.size + 1, len(self.prices))
+
+    def rows(self, limit: int = None) -> list[tuple[int, int, int, bool]]:
+        # (timestamp, price, count, bin), newest first
+        capacity = len(self.prices)
+        limit = self.size if limit is None else min(limit, self.size)
+        result = []
+        for k in range(1, limit + 1):
+            i = (self.head - k) % capacity
+            result.append((self.timestamps[i], self.prices[i], self.counts[i], bool(self.bins[i])))
+        return result
+
+
+class Rollup:
+    # OHLC and volume per fixed width time bucket of one item, oldest buckets dropped past retention.
+    # Row: [open, high, low, close, sales, items, coins]
+    __slots__ = ("width", "retention", "starts", "rows")
+
+    def __init__(self, width: int, retention: int):
+        self.width = width  # ms
+        self.retention = retention  # ms
+        self.starts = []  # sorted bucket starts
+        self.rows = []
+
+    def add(self, timestamp: int, price: int, count: int):
+        start = timestamp - timestamp % self.width
+        if self.starts and self.starts[-1] == start:  # sales arrive in time order, nearly always the last bucket
+            i = len(self.starts) - 1
+        else:
+            i = bisect.bisect_left(self.starts, start)
+            if i == len(self.starts) or self.starts[i] != start:
+                self.starts.insert(i, start)
+                self.rows.insert(i, [price, price, price, price, 0, 0, 0])
+
+        row = self.rows[i]
+        row[1] = max(row[1], price)
+        row[2] = min(row[2], price)
+        row[3] = price
+        row[4] += 1
+        row[5] += count
+        row[6] += price
+
+    def trim(self, now: int):
+        stop = bisect.bisect_left(self.starts, now - self.retention)
+        if stop:
+            del self.starts[:stop]
+            del self.rows[:stop]
+
+    def range(self, since: int = None, until: int = None) -> list[tuple]:
+        # (start, open, high, low, close, sales, items, coins) of buckets starting in [since, until)
+        start = 0 if since is None else bisect.bisect_left(self.starts, since - since % self.width)
+        stop = len(self.starts) if until is None else bisect.bisect_left(self.starts, until)
+        return [(s, *row) for s, row in zip(self.starts[start:stop], self.rows[start:stop])]
+
+
+class SalesHistory:
+    # Append only sales per item_id from auctions_ended: a ring of raw rows plus 1m/1h/1d rollups.
+    # Memory is bounded by ring rows per item and each resolution's retention.
+    MINUTE = 60 * 1000
+    HOUR = 60 * MINUTE
+    DAY = 24 * HOUR
+    RESOLUTIONS = {"1m": MINUTE, "1h": HOUR, "1d": DAY}  # finest first
+    RETENTION = {"1m": DAY, "1h": 30 * DAY, "1d": 365 * DAY}
+
+    def __init__(self, ring: int = 256, retention: dict = None):
+        self.ring = ring
+        self.retention = {**self.RETENTION, **(retention or {})}
+        self.__items = {}  # {item_id: (SalesRing, {resolution: Rollup})}
+        self.__seen = set()  # auction_ids of the last batch
+        self.sales = 0
+
+    def fresh(self, auction_ids: list[str]) -> set[str]:
+        # ids missing from the previous batch, auctions_ended overlaps between cycles
+        fresh = set(auction_ids) - self.__seen
+        self.__seen = set(auction_ids)
+        return fresh
+
+    def add(self, item_id: str, timestamp: int, price: int, count: int = 1, bin: bool = True):
+        entry = self.__items.get(item_id)
+        if entry is None:
+            entry = self.__items[item_id] = (SalesRing(self.ring), {
+                resolution: Rollup(width, self.retention[resolution])
+                for resolution, width in self.RESOLUTIONS.items()
+            })
+
+        ring, rollups = entry
+        ring.append(timestamp, price, count, bin)
+        for rollup in rollups.values():
+            rollup.add(timestamp, price, count)
+        self.sales += 1
+
+    def trim(self, now: int = None):
+        now = int(time.time() * 1000) if now is None else now
+        for item_id in list(self.__items):
+            rollups = self.__items[item_id][1]
+            for rollup in rollups.values():
+                rollup.trim(now)
+            if not any(rollup.starts for rollup in rollups.values()):
+                del self.__items[item_id]
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.__items
+
+    def recent(self, item_id: str, limit: int = 50) -> list[tuple]:
+        # latest raw sales, (timestamp, price, count, bin) newest first
+        entry = self.__items.get(item_id)
+        return entry[0].rows(limit) if entry else []
+
+    def history(self, item_id: str, resolution: str = "1h", since: int = None, until: int = None) -> list[tuple]:
+        # (start, open, high, low, close, sales, items, coins) buckets, oldest first
+        entry = self.__items.get(item_id)
+        return entry[1][resolution].range(since, until) if entry else []
+
+    def summary(self, item_id: str, days: float = 1, now: int = None) -> dict | None:
+        # aggregated from the finest rollup still retaining the whole window, no raw rows are scanned
+        now = int(time.time() * 1000) if now is None else now
+        window = int(days * self.DAY)
+        resolution = next(
+            (resolution for resolution in self.RESOLUTIONS if self.retention[resolution] >= window), "1d"
+        )
+        buckets = self.history(item_id, resolution, now - window)
+        if not buckets:
+            return None
+
+        sales = sum(bucket[5] for bucket in buckets)
+        coins = sum(bucket[7] for bucket in buckets)
+        return {
+            "open": buckets[0][1],
+            "high": max(bucket[2] for bucket in buckets),
+            "low": min(bucket[3] for bucket in buckets),
+            "close": buckets[-1][4],
+            "sales": sales,
+            "items": sum(bucket[6] for bucket in buckets),
+            "coins": coins,
+            "mean": coins / sales
+        }
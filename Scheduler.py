@@ -0,0 +1,83 @@
+import time
+from collections import deque
+
+
+class Scheduler:
+    # Learns when the api publishes from the lastUpdated values it serves and times the next cycle to match.
+    # Times are local unix seconds, so any clock skew to the api ends up in the learned availability and cancels out.
+    def __init__(self, interval: float = 60, availability: float = 10, margin: float = 0.5, history: int = 30):
+        self.interval = interval  # until enough publishes were seen
+        self.availability = availability  # s from lastUpdated until the data is served, until learned
+        self.margin = margin  # probes go out this early, so they wait for the publish and measure it
+        self.__published = deque(maxlen=history)  # distinct lastUpdated values, s
+        self.__available = deque(maxlen=history)  # s from lastUpdated until the data was served
+        self.__freshness = deque(maxlen=history)  # s from lastUpdated until our snapshot had it
+        self.__late = 0  # cycles that found the api already ahead of the prediction by a whole interval
+
+    @staticmethod
+    def __percentile(values, q: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def observe(self, last_updated: int, seen: float = None, polled: bool = False):
+        # seen is when a probe first got this lastUpdated, leave it out when the wait in between is unknown
+        # polled is whether the probe had to wait for it, only then is seen when it became available
+        published = last_updated / 1000
+        if self.__published and published <= self.__published[-1]:
+            return
+
+        if self.__published and published - self.__published[-1] > 1.5 * self.cadence():
+            self.__late += 1
+        self.__published.append(published)
+        if seen is None:
+            return
+        if polled:
+            self.__available.append(seen - published)
+        else:
+            # already out when probed, so it could have been sooner: try earlier next time
+            self.__available.append(max(0.0, min(seen - published, self.__availability()) - self.margin))
+
+    def __availability(self) -> float:
+        # lowest observed wait is when it's really served, later ones were us arriving late
+        return self.__percentile(self.__available, 0.1) if self.__available else self.availability
+
+    def cadence(self) -> float:
+        if len(self.__published) < 2:
+            return self.interval
+
+        # gaps spanning missed publishes count as several intervals
+        gaps = []
+        for before, after in zip(self.__published, list(self.__published)[1:]):
+            gap = after - before
+            gaps.append(gap / max(1, round(gap / self.interval)))
+        return self.__percentile(gaps, 0.5)
+
+    def next_publish(self) -> float | None:
+        # predicted lastUpdated of the next publish, s
+        return self.__published[-1] + self.cadence() if self.__published else None
+
+    def delay(self, now: float = None) -> float:
+        # seconds to sleep before probing for the next publish
+        now = time.time() if now is None else now
+        published = self.next_publish()
+        if published is None:
+            return 0.0
+
+        start = published + self.__availability() - self.margin
+        return max(0.0, start - now)  # already past it, probe right away
+
+    def record_freshness(self, generation: int, now: float = None) -> float:
+        # lag between the api publishing a generation and our snapshot holding it
+        lag = (time.time() if now is None else now) - generation / 1000
+        self.__freshness.append(lag)
+        return lag
+
+    def get_metrics(self) -> dict:
+        metrics = {"cadence_s": round(self.cadence(), 2), "late": self.__late}
+        if self.__available:
+            metrics["availability_s"] = round(self.__availability(), 2)
+        if self.__freshness:
+            metrics["freshness_last_s"] = round(self.__freshness[-1], 2)
+            metrics["freshness_mean_s"] = round(sum(self.__freshness) / len(self.__freshness), 2)
+            metrics["freshness_max_s"] = round(max(self.__freshness), 2)
+        return metrics
@@ -1,48 +1,150 @@
 import aiohttp
 import asyncio
+import random
+import time
+from collections import deque
+from JSONBackend import JSONBackend
 from Utilities import time_func
 
 
+class FetchError(Exception):
+    pass
+
+
 class Scrapper:
     __API_URL = "https://api.hypixel.net/v2/"
     __URL = __API_URL + "skyblock/auctions?page={}"
     __ENDED_URL = __API_URL + "skyblock/auctions_ended"
     __ITEMS_URL = __API_URL + "resources/skyblock/items"
-    __DELAY = 2  # re-fetch delay
+    __DELAY = 1  # re-fetch delay while waiting for a publish, the scheduler aims to not need it
+    __PREFETCH = 2  # pages requested ahead of the one being scanned by iter_new
+    __RETRIES = 5
+    __BACKOFF = 0.5  # base retry delay, doubled every attempt
+    __MAX_BACKOFF = 30
+    __RETRY_STATUSES = (429, 500, 502, 503, 504)
+    __TIMEOUT = 30
 
-    def __init__(self):
+    def __init__(self, max_in_flight: int = 16, json_backend: JSONBackend = None):
         self.__session = None
+        self.json = json_backend or JSONBackend()
         self.__last_updated = 0
+        self.__waited = False  # whether the last update fetch had to wait for the publish
+        self.__metrics = {}
+        self.__positions = {}  # {uuid: page_num} of non-bin auctions, they keep their place in the listing
+        self.__total_pages = 0
+        self.__items_validators = {}  # ETag / Last-Modified of the last items response
+        self.__items_updated = 0  # lastUpdated of the last items response
+
+        self.max_in_flight = max_in_flight
+        self.__semaphore = asyncio.Semaphore(max_in_flight)
+        self.__blocked_until = 0.0  # set by 429s, shared by every request
+        self.__latencies = deque(maxlen=1000)  # seconds, most recent requests
+        self.__requests = 0
+        self.__retries = 0
+        self.__rate_limited = 0
+
+    def __backoff(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+
+        delay = min(self.__MAX_BACKOFF, self.__BACKOFF * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.5)  # jitter so retries don't arrive together
+
+    async def __request(self, url: str, loads=None, validators: dict = None) -> dict | None:
+        # validators makes the request conditional, None is returned when the server says nothing changed
+        headers = {}
+        if validators:
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        for attempt in range(self.__RETRIES + 1):
+            wait = self.__blocked_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            retry_after = None
+            async with self.__semaphore:
+                start_time: float = time.perf_counter()
+                try:
+                    async with self.__session.get(url, headers=headers) as resp:
+                        if resp.status in (200, 304):
+                            self.__requests += 1
+                            self.__latencies.append(time.perf_counter() - start_time)
+                            if resp.status == 304:
+                                return None
+
+                            page: dict = (loads or self.json.loads)(await resp.read())
+                            if validators is not None:  # only once the body is in hand, a retry must refetch it
+                                for header in ("ETag", "Last-Modified"):
+                                    if header in resp.headers:
+                                        validators[header] = resp.headers[header]
+                            return page
 
-    async def __fetch(self, url: str, update: bool = False, override: bool = False) -> dict:
-        resp: aiohttp.ClientResponse = await self.__session.get(url)
+                        error = f"Error code: {resp.status}\n{url}\n{await resp.read()}"
+                        if resp.status not in self.__RETRY_STATUSES:
+                            raise FetchError(f"Unable to reach page.\n{error}")
+                        if resp.status == 429:
+                            self.__rate_limited += 1
+                            retry_after = resp.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = f"{type(e).__name__}: {e}\n{url}"
 
-        if resp.status != 200:
-            raise Exception(f"Unable to reach page.\nError code: {resp.status}\n{url}\n{await resp.read()}")
+            if attempt == self.__RETRIES:  # out of retries, don't wait just to give up
+                break
 
-        page: dict = await resp.json()
-        last_updated: int = page["lastUpdated"]
+            delay = self.__backoff(attempt, retry_after)
+            if retry_after is not None:  # hold back every request, not just this one
+                self.__blocked_until = max(self.__blocked_until, time.monotonic() + delay)
 
-        if override:
-            return page
+            self.__retries += 1
+            print(f"URL: {url[36:]} | Retrying in {round(delay, 2)}s ({attempt + 1}/{self.__RETRIES})")
+            await asyncio.sleep(delay)
+
+        raise FetchError(f"Unable to reach page after {self.__RETRIES} retries.\n{error}")
+
+    async def __fetch(
+            self, url: str, update: bool = False, override: bool = False, loads=None, validators: dict = None
+    ) -> dict | None:
+        waited = False
+        while True:
+            page: dict = await self.__request(url, loads, validators)
+            if page is None:  # not modified
+                return None
+            last_updated: int = page["lastUpdated"]
+
+            if override:
+                return page
+
+            if last_updated > self.__last_updated:  # if this ver is more recent (should be ~60s)
+                if update:
+                    self.__last_updated = last_updated
+                    self.__waited = waited
+                    return page
 
-        if last_updated > self.__last_updated:  # if this ver is more recent (should be ~60s)
-            if update:
-                self.__last_updated = last_updated
-            else:
                 print(self.__last_updated, last_updated)
-                raise Exception("Page is more recent. This shouldn't be possible (Unless startup).")
-        elif not (last_updated == self.__last_updated and not update):  # Waiting for update
+                raise FetchError("Page is more recent. This shouldn't be possible (Unless startup).")
+            elif last_updated == self.__last_updated and not update:
+                return page
+
+            # Waiting for update
             print(f"URL: {url[36:]} | Waiting {self.__DELAY}s")
+            waited = True
             await asyncio.sleep(self.__DELAY)
-            page = await self.__fetch(url, update=update)
-
-        return page
 
     @time_func("Fetch items index")
-    async def get_items(self) -> dict:
+    async def get_items(self, force: bool = False) -> dict | None:
+        # None when the resource hasn't changed since the last call, either by ETag or lastUpdated
         url = self.__ITEMS_URL
-        resp = await self.__fetch(url, override=True)  # Different schedule
+        if force:
+            self.__items_validators = {}
+            self.__items_updated = 0
+
+        resp = await self.__fetch(url, override=True, validators=self.__items_validators)  # Different schedule
+        if resp is None or (self.__items_updated and resp.get("lastUpdated") == self.__items_updated):
+            return None
+        self.__items_updated = resp.get("lastUpdated", 0)
 
         items = {}
         for item in resp["items"]:
@@ -51,57 +153,163 @@ class Scrapper:
 
         return items
 
-    @time_func("Fetch all auctions")
-    async def get_auctions(self) -> list:
-        url = self.__URL.format(0)
-        first_page = await self.__fetch(url, update=True)
+    async def __fetch_page(self, page_num: int) -> dict:
+        return await self.__fetch(self.__URL.format(page_num), loads=self.json.loads_page)
+
+    async def __fetch_auctions(self, page_num: int) -> list:
+        page = await self.__fetch_page(page_num)
+        self.__total_pages = page["totalPages"]
+        self.__track_positions(page_num, page["auctions"])
+        return page["auctions"]  # page dict is dropped here, only the auctions are kept
+
+    def __track_positions(self, page_num: int, auctions: list):
+        for auction in auctions:
+            if not auction["bin"]:
+                self.__positions[auction["uuid"]] = page_num
+
+    def get_position(self, uuid: str) -> int | None:
+        # page a non-bin auction was last seen on
+        return self.__positions.get(uuid)
+
+    def forget(self, uuid: str):
+        self.__positions.pop(uuid, None)
+
+    async def iter_pages(self, page_nums):
+        # (page_num, auctions) for just these pages as they land, pages past the end are skipped
+        pending = {
+            asyncio.ensure_future(self.__fetch_auctions(page_num)): page_num
+            for page_num in page_nums if page_num < self.__total_pages
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_auctions(self):
+        # yields each page's auctions as soon as it lands, in arrival order
+        first_page = await self.__fetch(self.__URL.format(0), update=True, loads=self.json.loads_page)
         total_pages: int = first_page["totalPages"]
+        auctions: list = first_page["auctions"]
+        del first_page
+        self.__total_pages = total_pages
+        self.__track_positions(0, auctions)
 
-        # preparing remaining pages tasks
-        tasks = []
-        for page_num in range(1, total_pages):
-            url = self.__URL.format(page_num)
-            tasks.append(self.__fetch(url))
+        pending = {asyncio.ensure_future(self.__fetch_auctions(page_num)) for page_num in range(1, total_pages)}
+        try:
+            yield auctions
 
-        # get remaining pages
-        pages: list = [first_page] + list(await asyncio.gather(*tasks))
-        auctions = [auction for page in pages for auction in page["auctions"]]
-        return auctions
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+                del done
+        finally:
+            for task in pending:
+                task.cancel()
 
-    @time_func("Fetch new auctions")
-    async def get_new(self, auction_uuids: list) -> list:
-        new_auctions = []
+    async def iter_new(self, known_uuids):
+        # known_uuids should be a set/dict, membership is checked for every auction scanned
+        # yields the new auctions of each page, callers may add them to known_uuids in between
+        found = set()  # uuids yielded this cycle, not yet known when the scan started
+        prefetched = {}  # {page_num: task}
         page_num = 0
+        total_pages = 1
 
-        while True:
-            url = self.__URL.format(page_num)
-            page = await self.__fetch(url)
-            auctions: list = page["auctions"]
+        try:
+            while page_num < total_pages:
+                task = prefetched.pop(page_num, None)
+                if task is None:
+                    task = asyncio.ensure_future(self.__fetch_page(page_num))
+                page = await task
+                total_pages = page["totalPages"]
+                auctions: list = page["auctions"]
+                del page, task
+                self.__total_pages = total_pages
+                self.__track_positions(page_num, auctions)
+
+                # fetch the next few pages while this one is scanned, most cycles only need one
+                for ahead in range(page_num + 1, min(page_num + 1 + self.__PREFETCH, total_pages)):
+                    if ahead not in prefetched:
+                        prefetched[ahead] = asyncio.ensure_future(self.__fetch_page(ahead))
+
+                page_num += 1
+                new_auctions = []
+                repeated = False
+                for auction in auctions:
+                    uuid = auction["uuid"]
+                    if uuid in found:
+                        continue
 
-            for auction in auctions:
-                # new auctions are prepended but non-bin auctions remain in the same position in api
-                if auction["uuid"] in auction_uuids:
-                    if auction["bin"]:  # found first real repeating
-                        return new_auctions
-                else:
-                    new_auctions.append(auction)
+                    # new auctions are prepended but non-bin auctions remain in the same position in api
+                    if uuid in known_uuids:
+                        if auction["bin"]:  # found first real repeating
+                            repeated = True
+                            break
+                    else:
+                        new_auctions.append(auction)
+                        found.add(uuid)
 
-            page += 1
+                if new_auctions:
+                    yield new_auctions
+                if repeated:
+                    break
+        finally:
+            for task in prefetched.values():
+                task.cancel()
+
+            self.__metrics["new_pages"] = page_num
+            self.__metrics["new_auctions"] = len(found)
+            print(f"{'New pages:'.ljust(20)}{page_num}")
 
     @time_func("Fetch ended")
-    async def get_ended(self) -> list:
+    async def get_ended_auctions(self) -> list[dict]:
+        # full records, auction_id, price, bin, timestamp and item_bytes among others
         page = await self.__fetch(self.__ENDED_URL, update=True)
         auctions: list = page["auctions"]
-
-        auction_ids = [auction["auction_id"] for auction in auctions]
-        return auction_ids
+        return auctions
 
     def get_last_updated(self) -> int:
         return self.__last_updated
 
+    def get_waited(self) -> bool:
+        return self.__waited
+
+    def get_metrics(self) -> dict:
+        metrics = self.__metrics.copy()
+
+        latencies = sorted(self.__latencies)
+        metrics["requests"] = self.__requests
+        metrics["retries"] = self.__retries
+        metrics["rate_limited"] = self.__rate_limited
+        if latencies:
+            metrics["latency_mean_ms"] = round(sum(latencies) / len(latencies) * 1000, 1)
+            metrics["latency_p95_ms"] = round(latencies[int(len(latencies) * 0.95)] * 1000, 1)
+            metrics["latency_max_ms"] = round(latencies[-1] * 1000, 1)
+
+        return metrics
+
+    async def open(self):
+        if self.__session is None or self.__session.closed:
+            # one pooled session for the lifetime of the scrapper so connections are reused
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, ttl_dns_cache=300)
+            self.__session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.__TIMEOUT)
+            )
+
+    async def close(self):
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
     async def __aenter__(self):
-        self.__session = aiohttp.ClientSession()
+        await self.open()
+        return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.__session.close()
+        await self.close()
 
@@ -0,0 +1,61 @@
+from types import MappingProxyType
+
+EMPTY = MappingProxyType({})
+
+
+class Snapshot:
+    # One published generation of the index, never mutated after it is created.
+    # Item buckets and categories untouched in a cycle are shared with the previous generation.
+    __slots__ = ("generation", "index", "attributes", "frequencies", "stats", "category_stats")
+
+    def __init__(
+            self, generation: int = 0, index=EMPTY, attributes=EMPTY, frequencies=EMPTY, stats=EMPTY,
+            category_stats=EMPTY
+    ):
+        self.generation = generation  # lastUpdated of the api data it was built from
+        self.index = index  # {item_id: {uuid: Auction}} read-only
+        self.attributes = attributes  # {category: {attribute: values}} exported from the Catalog
+        self.frequencies = frequencies  # {category: {path: {value: count}}}
+        self.stats = stats  # {item_id: {"bin" | "auction" | "all": price summary}} see PriceStats
+        self.category_stats = category_stats  # {category: {"count", "bins", "lowest_bin", "quantiles"}}
+
+    def patch(
+            self, generation: int, index: dict, catalog, price_stats, category_table, items: set, categories: set
+    ) -> "Snapshot":
+        # copies only the buckets that changed, the rest are shared
+        new_index = dict(self.index)
+        new_stats = dict(self.stats)
+        for item_id in items:
+            auctions = index.get(item_id)
+            if auctions:
+                new_index[item_id] = MappingProxyType(auctions.copy())
+                new_stats[item_id] = price_stats.summary(item_id)
+            else:
+                new_index.pop(item_id, None)
+                new_stats.pop(item_id, None)
+
+        new_attributes = dict(self.attributes)
+        new_frequencies = dict(self.frequencies)
+        new_category_stats = dict(self.category_stats)
+        for category in categories:
+            summary = category_table.summary(category)
+            if summary is None:
+                new_category_stats.pop(category, None)
+            else:
+                new_category_stats[category] = summary
+
+            if category in catalog:
+                new_attributes[category] = catalog.export(category)
+                new_frequencies[category] = catalog.frequencies(category)
+            else:
+                new_attributes.pop(category, None)
+                new_frequencies.pop(category, None)
+
+        return Snapshot(
+            generation,
+            MappingProxyType(new_index),
+            MappingProxyType(new_attributes),
+            MappingProxyType(new_frequencies),
+            MappingProxyType(new_stats),
+            MappingProxyType(new_category_stats)
+        )
@@ -0,0 +1,71 @@
+import bisect
+
+
+class SortIndex:
+    # Per item sorted (key, uuid) lists for the search view's sort options.
+    # Cursors are the (key, uuid) of the last row shown, so they stay valid as auctions come and go.
+    KEYS = ("price", "start")
+    SORTS = {
+        "Lowest Price": ("price", False),
+        "Highest Price": ("price", True),
+        "Newest": ("start", True),
+        "Oldest": ("start", False)
+    }
+
+    def __init__(self):
+        self.__items = {}  # {item_id: {key: [(value, uuid)]}}
+
+    def add(self, auction):
+        orders = self.__items.get(auction.item_id)
+        if orders is None:
+            orders = self.__items[auction.item_id] = {key: [] for key in self.KEYS}
+
+        for key in self.KEYS:
+            bisect.insort(orders[key], (getattr(auction, key), auction.uuid))
+
+    def remove(self, auction):
+        orders = self.__items.get(auction.item_id)
+        if orders is None:
+            return
+
+        for key in self.KEYS:
+            row = (getattr(auction, key), auction.uuid)
+            rows = orders[key]
+            i = bisect.bisect_left(rows, row)
+            if i < len(rows) and rows[i] == row:
+                del rows[i]
+
+        if not orders["price"]:
+            del self.__items[auction.item_id]
+
+    def page(
+            self, item_id: str, sort: str = "Lowest Price", limit: int = 10,
+            offset: int = 0, after: tuple = None, before: tuple = None
+    ) -> tuple[list[str], dict]:
+        # uuids of one page in display order and {"total", "offset", "next", "previous"} cursors
+        # after/before take a cursor from a previous page, otherwise offset counts rows in display order
+        key, descending = self.SORTS[sort]
+        rows = self.__items.get(item_id, {}).get(key, [])
+        total = len(rows)
+
+        # work in ascending list positions, [start, stop) is the page
+        if after is not None:
+            position = bisect.bisect_left(rows, tuple(after)) if descending else bisect.bisect_right(rows, tuple(after))
+            start, stop = (max(0, position - limit), position) if descending else (position, position + limit)
+        elif before is not None:
+            position = bisect.bisect_right(rows, tuple(before)) if descending else bisect.bisect_left(rows, tuple(before))
+            start, stop = (position, position + limit) if descending else (max(0, position - limit), position)
+        else:
+            start, stop = (max(0, total - offset - limit), total - offset) if descending else (offset, offset + limit)
+
+        start, stop = max(0, start), min(total, max(0, stop))
+        page = rows[start:stop]  # one slice, the bucket itself is never copied
+        if descending:
+            page.reverse()
+
+        return [uuid for _, uuid in page], {
+            "total": total,
+            "offset": total - stop if descending else start,
+            "next": page[-1] if page and (start > 0 if descending else stop < total) else None,
+            "previous": page[0] if page and (stop < total if descending else start > 0) else None
+        }
@@ -0,0 +1,42 @@
+import mmap
+import os
+import pickle
+import struct
+
+
+class StateFile:
+    # Binary dump of the decoded index so a restart only needs the delta.
+    # Layout: magic, version, then one pickle of (generation, index, attributes).
+    __MAGIC = b"SBAI"
+    __VERSION = 2
+    __HEADER = struct.Struct(">4sI")
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def dump(self, generation: int, index: dict, attributes) -> int:
+        payload = pickle.dumps((generation, dict(index), attributes), protocol=pickle.HIGHEST_PROTOCOL)
+
+        # write beside the old file and swap, a crash mid-write never leaves a torn state
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.__HEADER.pack(self.__MAGIC, self.__VERSION))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        return self.__HEADER.size + len(payload)
+
+    def load(self) -> tuple | None:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= self.__HEADER.size:
+            return None
+
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version = self.__HEADER.unpack(mapped.read(self.__HEADER.size))
+            if magic != self.__MAGIC or version != self.__VERSION:
+                print(f"Ignoring state file {self.path}, unknown format")
+                return None
+
+            # unpickle straight from the mapping rather than reading the file into memory first
+            return pickle.load(mapped)
@@ -1,11 +1,12 @@
 import time
+from collections.abc import Mapping
 
 
 def format_output(var):
     match var:
-        case set():
-            var = list(var)
-        case dict():
+        case set() | frozenset() | tuple() | list():  # Catalog exports frozensets and tuples
+            var = [format_output(v) for v in var]
+        case Mapping():  # dicts and Auction records
             var = {k: format_output(v) for k, v in var.items()}
     return var
 
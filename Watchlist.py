@@ -0,0 +1,164 @@
+import asyncio
+import bisect
+import itertools
+from AttributeIndex import AttributeIndex
+from Catalog import Catalog
+
+
+class Watch:
+    # "notify me when item_id (or anything in category) with these attributes lists at or below max_price"
+    # conditions are AttributeIndex style: (attribute, value) or (attribute, slice(low, high)) for int ranges
+    __slots__ = ("id", "item_id", "category", "conditions", "max_price", "bin_only", "owner")
+    __ids = itertools.count(1)
+
+    def __init__(
+            self, item_id: str = None, category: str = None, conditions=(), max_price: int = None,
+            bin_only: bool = True, owner=None
+    ):
+        if (item_id is None) == (category is None):
+            raise ValueError("A watch needs exactly one of item_id or category")
+
+        self.id = next(self.__ids)
+        self.item_id = item_id
+        self.category = category
+        self.conditions = tuple(
+            (AttributeIndex.path(attribute), value if isinstance(value, slice) else Catalog.canonical(value))
+            for attribute, value in conditions
+        )
+        self.max_price = max_price
+        self.bin_only = bin_only
+        self.owner = owner  # anything the consumer needs to deliver it, e.g. a user id
+
+    def anchor(self) -> tuple | None:
+        # the first exact condition, watches are indexed under it
+        for condition in self.conditions:
+            if not isinstance(condition[1], slice):
+                return condition
+        return None
+
+    def matches(self, auction, values: dict) -> bool:
+        # values: {path: {value}} of the auction's extras
+        if self.bin_only and not auction.bin:
+            return False
+        if self.max_price is not None and auction.price > self.max_price:
+            return False
+
+        for path, value in self.conditions:
+            found = values.get(path, ())
+            if isinstance(value, slice):
+                if not any(
+                        isinstance(v, int) and (value.start is None or v >= value.start)
+                        and (value.stop is None or v <= value.stop) for v in found
+                ):
+                    return False
+            elif value not in found:
+                return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"Watch({self.id}, {self.item_id or self.category}, {self.conditions}, <= {self.max_price})"
+
+
+class Watchlist:
+    # Matches newly listed auctions against registered watches.
+    # Watches are indexed by item_id or category, then by their anchor (path, value), so an auction only
+    # checks watches under its own keys and attribute values. Anchorless watches are sorted by max_price
+    # and only those at or above the auction's price are checked.
+    # Registration swaps in a new index with the changed key rebuilt, matching never sees one half updated.
+    def __init__(self):
+        self.__watches = {}  # {id: Watch}
+        self.__keyed = {}  # {key: {id: Watch}}
+        self.__index = {}  # {("item" | "category", key): ({(path, value): [Watch]}, [(max_price, id)], {id: Watch})}
+        self.__queues = []  # [(loop, asyncio.Queue)]
+        self.matched = 0
+
+    @staticmethod
+    def __key(watch: Watch) -> tuple:
+        return ("item", watch.item_id) if watch.item_id is not None else ("category", watch.category)
+
+    def add(self, watch: Watch) -> Watch:
+        self.__watches[watch.id] = watch
+        self.__keyed.setdefault(self.__key(watch), {})[watch.id] = watch
+        self.__reindex(self.__key(watch))
+        return watch
+
+    def remove(self, watch_id: int) -> bool:
+        watch = self.__watches.pop(watch_id, None)
+        if watch is None:
+            return False
+
+        key = self.__key(watch)
+        del self.__keyed[key][watch_id]
+        if not self.__keyed[key]:
+            del self.__keyed[key]
+        self.__reindex(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self.__watches)
+
+    def __reindex(self, key: tuple):
+        # copy on write of the one key that changed
+        anchored, unanchored, by_id = {}, [], {}
+        for watch in self.__keyed.get(key, {}).values():
+            anchor = watch.anchor()
+            if anchor is None:
+                unanchored.append((float("inf") if watch.max_price is None else watch.max_price, watch.id))
+                by_id[watch.id] = watch
+            else:
+                anchored.setdefault(anchor, []).append(watch)
+        unanchored.sort()
+
+        index = dict(self.__index)
+        if anchored or unanchored:
+            index[key] = (anchored, unanchored, by_id)
+        else:
+            index.pop(key, None)
+        self.__index = index
+
+    def queue(self) -> asyncio.Queue:
+        # called from the consumer's event loop, matches are (Watch, Auction) and may come from another thread
+        queue = asyncio.Queue()
+        self.__queues.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def __deliver(self, match: tuple):
+        for loop, queue in self.__queues:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(queue.put_nowait, match)
+
+    def match(self, auctions, category) -> list[tuple]:
+        # auctions are newly listed records, category maps an item_id to its category
+        index = self.__index
+        if not index:
+            return []
+
+        matches = []
+        for auction in auctions:
+            keys = [("item", auction.item_id), ("category", category(auction.item_id))]
+            entries = [index[key] for key in keys if key in index]
+            if not entries:
+                continue
+
+            values = {}
+            if auction.extras:
+                for path, value in Catalog.walk(auction.extras):
+                    values.setdefault(path, set()).add(value)
+
+            for anchored, unanchored, by_id in entries:
+                candidates = []
+                if anchored:
+                    for path, found in values.items():
+                        for value in found:
+                            candidates.extend(anchored.get((path, value), ()))
+                start = bisect.bisect_left(unanchored, (auction.price, -1))
+                candidates.extend(by_id[watch_id] for _, watch_id in unanchored[start:])
+
+                for watch in candidates:
+                    if watch.matches(auction, values):
+                        matches.append((watch, auction))
+
+        for match in matches:
+            self.__deliver(match)
+        self.matched += len(matches)
+        return matches
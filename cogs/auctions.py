@@ -1,11 +1,10 @@
-from statistics import mean, median, mode
 import discord
 
 
 async def item_id_autocomplete(ctx: discord.AutocompleteContext):
     scrapper = ctx.bot.scrapper
 
-    item_ids = scrapper.get_item_names()
+    item_ids = scrapper.get_item_names(ctx.value)
 
     return item_ids
 
@@ -26,7 +25,7 @@ class Auctions(discord.Cog):
             self,
             ctx: discord.ApplicationContext,
             item_name: str = discord.Option(
-                autocomplete=discord.utils.basic_autocomplete(item_id_autocomplete),
+                autocomplete=item_id_autocomplete,
                 required=True
             )
     ):
@@ -37,15 +36,16 @@ class Auctions(discord.Cog):
         embed = discord.Embed(title=item_name, description="\n".join(attributes))
         view = discord.ui.View()
 
-        prices = [auction["price"] for auction in auctions.values() if auction["bin"]]
-        embed.add_field(
-            name="Median Bin Price",
-            value=f"${median(prices):,}"
-        )
-        embed.add_field(
-            name="Average Bin Price",
-            value=f"${round(mean(prices)):,}"
-        )
+        stats = self.scrapper.get_price_stats(item_id, bin=True)
+        if stats is not None:
+            embed.add_field(
+                name="Median Bin Price",
+                value=f"${round(stats['median']):,}"
+            )
+            embed.add_field(
+                name="Average Bin Price",
+                value=f"${round(stats['mean']):,}"
+            )
 
 
         nav_buttons = {
@@ -224,7 +224,7 @@ class Auctions(discord.Cog):
             self,
             ctx: discord.ApplicationContext,
             item_name: str = discord.Option(
-                autocomplete=discord.utils.basic_autocomplete(item_id_autocomplete),
+                autocomplete=item_id_autocomplete,
                 required=True,
             ),
             bin: bool = discord.Option(bool, required=False),
@@ -237,26 +237,23 @@ class Auctions(discord.Cog):
 
             return f"{round(num, 2)} {['', 'K', 'M', 'B'][magnitude]}"
 
-        auctions: dict = self.scrapper.get_index()
         item_id: str = item_name.replace(" ", "_").upper()
-        filtered = [
-            auction["starting_bid"] if (auction["bin"] or auction["highest_bid_amount"] == 0) else auction[
-                "highest_bid_amount"]
-            for auction in auctions[item_id]["entries"].values()
-            if (bin is None or auction["bin"] == bin)
-        ]
+        stats = self.scrapper.get_price_stats(item_id, bin)
 
         await ctx.defer()
 
         embed = discord.Embed(title=item_id)
+        if stats is None:
+            await ctx.respond(embed=embed)
+            return
 
         fields = {
-            "Count": len(filtered),
-            "Cheapest": min(filtered),
-            "Expensive": max(filtered),
-            "Mean": mean(filtered),
-            "Median": median(filtered),
-            "Mode": mode(filtered)
+            "Count": stats["count"],
+            "Cheapest": stats["min"],
+            "Expensive": stats["max"],
+            "Mean": stats["mean"],
+            "Median": stats["median"],
+            "Mode": stats["mode"]
         }
 
         for name, value in fields.items():
@@ -266,11 +263,13 @@ class Auctions(discord.Cog):
 
     @discord.slash_command()
     async def find_most(self, ctx: discord.ApplicationContext):
-        index = self.scrapper.get_index
-        table = {len(index[item_id]["auctions"]): item_id for item_id in index}
-        most = max(table)
+        leaderboard = self.scrapper.get_leaderboard("auctions", 1)
+        if not leaderboard:
+            await ctx.respond("No auctions yet")
+            return
 
-        await ctx.respond(f"{table[most]}: {most}")
+        item_id, most = leaderboard[0]
+        await ctx.respond(f"{item_id}: {most}")
 
 def setup(bot):
     bot.add_cog(Auctions(bot))